@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark Menu - Misura i tempi della pipeline del menu The Craft
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from menu_generator_core import (generate_complete_html_menu, get_price_columns, identify_columns,
+                                 read_all_excel_sheets, render_sheet_section)
+
+# Fogli del workbook sintetico: nome, layout di make_synthetic_sheet e quota delle righe
+SYNTHETIC_SHEETS = [("Birre Spina", 'spina', 0.3), ("Gin Tonic", 'prezzo', 0.3), ("Calici", 'misure', 0.2), ("Bevande", 'prezzo', 0.2)]
+
+BASELINE_FILE = "benchmark_baseline.json"
+
+# Differenze assolute sotto cui una misura non conta come regressione (rumore sui casi piccoli)
+MIN_DELTA = {'read_seconds': 0.005, 'render_seconds': 0.005, 'read_peak_mb': 0.5, 'data_mb': 0.5, 'render_peak_mb': 0.5}
+
+def read_all_excel_sheets_legacy(file_path):
+    """
+    Loader precedente: riapre il file Excel con pd.read_excel per ogni foglio
+    """
+    excel_file = pd.ExcelFile(file_path)
+    sheets_data = {}
+    for sheet_name in excel_file.sheet_names:
+        df = pd.read_excel(file_path, sheet_name=sheet_name)
+        if not df.empty:
+            if 'Menu' in df.columns:
+                df_filtered = df[df['Menu'] == 1]
+                if not df_filtered.empty:
+                    sheets_data[sheet_name] = df_filtered
+            else:
+                sheets_data[sheet_name] = df
+    return sheets_data
+
+def render_sheet_section_legacy(sheet_name, df):
+    """
+    Renderer precedente: scorre le righe con df.iterrows() e concatena le stringhe
+    """
+    section_id = sheet_name.lower().replace(" ", "_")
+    section_content = f'<div class="menu-section" id="{section_id}">\n'
+    section_content += f'<h2 class="section-title">{sheet_name} <a href="#top" class="back-to-top">↑</a></h2>\n'
+    
+    # Identifica le colonne (escludendo la colonna Menu)
+    roles = identify_columns(df.columns)
+    name_column = roles['name']
+    price_column = roles['price']
+    description_column = roles['description']
+    brewery_column = roles['brewery']
+    tipo_column = roles['tipo']
+    caratteristica_column = roles['caratteristica']
+    
+    # Controlla se abbiamo colonne di prezzo numeriche (per diverse misure)
+    price_columns = get_price_columns(df.columns)
+    
+    if price_columns:
+        # Caso speciale: menu con diverse misure/prezzi
+        if sheet_name == "Birre Spina":
+            # Layout speciale per Birre Spina con tabella prezzi
+            section_content += '<div class="price-table">\n'
+            section_content += '<div class="price-header">\n'
+            section_content += '<div class="price-row">\n'
+    
+            # Prima colonna vuota per le intestazioni
+            section_content += '<div class="price-cell"></div>\n'
+    
+            # Intestazioni delle colonne (spostate a destra di una posizione, ordine decrescente)
+            for price_col in sorted(price_columns, reverse=True):
+                section_content += f'<div class="price-cell">{price_col}L</div>\n'
+    
+            section_content += '</div>\n'
+            section_content += '</div>\n'
+    
+            # Righe dei prezzi per ogni birra
+            for _, row in df.iterrows():
+                name = row[name_column] if name_column and pd.notna(row[name_column]) else "Nome non disponibile"
+                description = row[description_column] if description_column and pd.notna(row[description_column]) else ""
+                brewery = row[brewery_column] if brewery_column and pd.notna(row[brewery_column]) else ""
+    
+                section_content += '<div class="price-row">\n'
+    
+                # Nome della birra nella prima colonna
+                if brewery:
+                    section_content += f'<div class="price-cell" style="text-align: left; font-weight: bold;">{name} - {brewery}</div>\n'
+                else:
+                    section_content += f'<div class="price-cell" style="text-align: left; font-weight: bold;">{name}</div>\n'
+    
+                # Prezzi per ogni misura (ordine decrescente)
+                for price_col in sorted(price_columns, reverse=True):
+                    if pd.notna(row[price_col]):
+                        section_content += f'<div class="price-cell"><span class="price-value">€{row[price_col]}</span></div>\n'
+                    else:
+                        section_content += '<div class="price-cell">-</div>\n'
+    
+                section_content += '</div>\n'
+    
+                # Descrizione sotto la riga
+                if description:
+                    section_content += f'<div class="item-description" style="padding: 4px 0; font-style: italic; color: #7f8c8d; font-size: 0.8em;">{description}</div>\n'
+    
+            section_content += '</div>\n'
+        else:
+            # Layout normale per altri fogli con prezzi multipli
+            for _, row in df.iterrows():
+                name = row[name_column] if name_column and pd.notna(row[name_column]) else "Nome non disponibile"
+                description = row[description_column] if description_column and pd.notna(row[description_column]) else ""
+                brewery = row[brewery_column] if brewery_column and pd.notna(row[brewery_column]) else ""
+                tipo = row[tipo_column] if tipo_column and pd.notna(row[tipo_column]) else ""
+                caratteristica = row[caratteristica_column] if caratteristica_column and pd.notna(row[caratteristica_column]) else ""
+    
+                section_content += f'<div class="menu-item">\n'
+    
+                # Header con nome e prezzo
+                section_content += f'<div class="item-header">\n'
+    
+                # Combina nome e produttore nella stessa riga
+                if brewery:
+                    section_content += f'<div class="item-name">{name} - <span class="item-producer">{brewery}</span></div>\n'
+                else:
+                    section_content += f'<div class="item-name">{name}</div>\n'
+    
+                # Mostra i prezzi per le diverse misure
+                prices_text = ""
+                for price_col in sorted(price_columns):
+                    if pd.notna(row[price_col]):
+                        prices_text += f"{price_col}L: €{row[price_col]} "
+    
+                section_content += f'<div class="item-price">{prices_text.strip()}</div>\n'
+                section_content += f'</div>\n'
+    
+                # Gestisci le descrizioni multiple per Gin Tonic
+                if tipo and caratteristica:
+                    section_content += f'<div class="item-description">{tipo} - {caratteristica}</div>\n'
+                elif tipo:
+                    section_content += f'<div class="item-description">{tipo}</div>\n'
+                elif caratteristica:
+                    section_content += f'<div class="item-description">{caratteristica}</div>\n'
+                elif description:
+                    section_content += f'<div class="item-description">{description}</div>\n'
+    
+                section_content += f'</div>\n'
+    else:
+        # Caso normale: un prezzo per articolo
+        for _, row in df.iterrows():
+            name = row[name_column] if name_column and pd.notna(row[name_column]) else "Nome non disponibile"
+            price = row[price_column] if price_column and pd.notna(row[price_column]) else "Prezzo non disponibile"
+            description = row[description_column] if description_column and pd.notna(row[description_column]) else ""
+            brewery = row[brewery_column] if brewery_column and pd.notna(row[brewery_column]) else ""
+            tipo = row[tipo_column] if tipo_column and pd.notna(row[tipo_column]) else ""
+            caratteristica = row[caratteristica_column] if caratteristica_column and pd.notna(row[caratteristica_column]) else ""
+    
+            section_content += f'<div class="menu-item">\n'
+    
+            # Header con nome e prezzo
+            section_content += f'<div class="item-header">\n'
+    
+            # Combina nome e produttore nella stessa riga
+            if brewery:
+                section_content += f'<div class="item-name">{name} - <span class="item-producer">{brewery}</span></div>\n'
+            else:
+                section_content += f'<div class="item-name">{name}</div>\n'
+    
+            section_content += f'<div class="item-price">{price}</div>\n'
+            section_content += f'</div>\n'
+    
+            # Gestisci le descrizioni multiple per Gin Tonic
+            if tipo and caratteristica:
+                section_content += f'<div class="item-description">{tipo} - {caratteristica}</div>\n'
+            elif tipo:
+                section_content += f'<div class="item-description">{tipo}</div>\n'
+            elif caratteristica:
+                section_content += f'<div class="item-description">{caratteristica}</div>\n'
+            elif description:
+                section_content += f'<div class="item-description">{description}</div>\n'
+    
+            section_content += f'</div>\n'
+    
+    section_content += f'</div>\n'
+    
+    return section_content
+
+def make_synthetic_sheet(layout, rows, seed=0):
+    """
+    Crea un foglio sintetico già filtrato con la stessa forma di quelli reali:
+    'spina' (tabella prezzi per misura), 'misure' (più prezzi per articolo) o 'prezzo' (un prezzo)
+    """
+    rng = np.random.default_rng(seed)
+    
+    def text(prefix, missing=0.1):
+        values = np.array([f"{prefix} {i % 997}" for i in range(rows)], dtype=object)
+        values[rng.random(rows) < missing] = np.nan
+        return values
+    
+    def prices(missing=0.1):
+        values = rng.choice([3.5, 4.0, 5.0, 5.5, 6.5, 7.0], size=rows)
+        values[rng.random(rows) < missing] = np.nan
+        return values
+    
+    data = {'Menu': np.ones(rows, dtype=int)}
+    if layout == 'spina':
+        data.update({'Birra': text("Birra"), 'Birrificio': text("Birrificio", 0.3), 'Stile': text("Stile", 0.2),
+                     0.4: prices(), 0.3: prices(0.3), 0.2: prices()})
+    elif layout == 'misure':
+        data.update({'Vino': text("Vino"), 'Cantina': text("Cantina", 0.3), 'Tipo': text("Tipo", 0.5),
+                     'Caratteristica': text("Caratteristica", 0.5), 0.75: prices(), 0.15: prices(0.3)})
+    else:
+        price = rng.choice([5, 6, 7, 9], size=rows).astype(object)
+        price[rng.random(rows) < 0.05] = "7-9"
+        price[rng.random(rows) < 0.05] = np.nan
+        data.update({'Gin': text("Gin"), 'Gineria': text("Gineria", 0.3), 'Tipo': text("Tipo", 0.5),
+                     'Caratteristica': text("Caratteristica", 0.5), 'Prezzo': price, 'Descrizione': text("Descrizione", 0.5)})
+    return pd.DataFrame(data)
+
+def time_call(func, *args, repeat=5):
+    """
+    Esegue la funzione più volte e restituisce (tempo migliore, tempo medio, ultimo risultato)
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings), result
+
+def make_synthetic_workbook(path, rows, seed=0):
+    """
+    Scrive un file Excel sintetico con la forma di quello reale (colonna Menu, misure 0.4/0.3/0.2,
+    colonne Tipo/Caratteristica del Gin Tonic) e circa rows righe in totale tra i fogli.
+    Circa una riga su dieci ha Menu=0 e viene scartata dal filtro
+    """
+    rng = np.random.default_rng(seed)
+    workbook = Workbook(write_only=True)
+    for position, (sheet_name, layout, share) in enumerate(SYNTHETIC_SHEETS):
+        df = make_synthetic_sheet(layout, max(1, int(rows * share)), seed=seed + position)
+        df['Menu'] = (rng.random(len(df)) >= 0.1).astype(int)
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append(list(df.columns))
+        for row in df.itertuples(index=False):
+            worksheet.append([None if pd.isna(value) else value for value in row])
+    workbook.save(path)
+    return path
+
+def measure(func, *args, repeat=3, **kwargs):
+    """
+    Misura una funzione: tempo migliore su repeat esecuzioni e picco di memoria (tracemalloc)
+    in un'esecuzione separata, così il tracciamento non pesa sui tempi.
+    Restituisce (secondi, picco in MB, ultimo risultato)
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / (1024 * 1024), result
+
+def run_suite(sizes, repeat=3, seed=0):
+    """
+    Misura lettura (read_all_excel_sheets) e generazione (generate_complete_html_menu)
+    su workbook sintetici di dimensione crescente, senza snapshot né cache di build
+    """
+    results = {}
+    print(f"{'righe':>8}{'lettura':>12}{'picco':>10}{'dati':>10}{'generazione':>14}{'picco':>10}{'HTML':>10}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for rows in sizes:
+            excel_file = make_synthetic_workbook(os.path.join(work_dir, f"menu_{rows}.xlsx"), rows, seed=seed)
+            output_file = os.path.join(work_dir, f"menu_{rows}.html")
+            read_seconds, read_peak, sheets_data = measure(read_all_excel_sheets, excel_file, repeat=repeat)
+            render_seconds, render_peak, _ = measure(generate_complete_html_menu, sheets_data, output_file, logo_src="", repeat=repeat)
+            html_size = os.path.getsize(output_file)
+            # Memoria occupata dai fogli filtrati per tutta la generazione
+            data_size = sum(df.memory_usage(index=True, deep=True).sum() for df in sheets_data.values()) / (1024 * 1024)
+            results[str(rows)] = {'read_seconds': read_seconds, 'read_peak_mb': read_peak, 'data_mb': data_size,
+                                  'render_seconds': render_seconds, 'render_peak_mb': render_peak,
+                                  'html_bytes': html_size}
+            print(f"{rows:>8}{read_seconds * 1000:>10.1f}ms{read_peak:>8.1f}MB{data_size:>8.1f}MB"
+                  f"{render_seconds * 1000:>12.1f}ms{render_peak:>8.1f}MB{html_size / 1024:>8.0f}KB")
+    return results
+
+def compare_with_baseline(results, baseline, tolerance=0.25):
+    """
+    Confronta i risultati con la baseline salvata: tempi e picchi di memoria oltre la tolleranza
+    (es. 0.25 = +25%) e sopra MIN_DELTA sono regressioni, HTML di dimensione diversa significa output cambiato.
+    Restituisce l'elenco delle regressioni
+    """
+    regressions = []
+    for rows, measures in results.items():
+        reference = baseline.get(rows)
+        if reference is None:
+            print(f"Nessuna baseline per {rows} righe")
+            continue
+        for metric in ('read_seconds', 'read_peak_mb', 'data_mb', 'render_seconds', 'render_peak_mb'):
+            if metric not in reference:
+                continue  # baseline salvata prima che la metrica esistesse
+            ratio = measures[metric] / reference[metric] if reference[metric] else 1.0
+            if ratio > 1 + tolerance and measures[metric] - reference[metric] > MIN_DELTA[metric]:
+                regressions.append(f"{rows} righe, {metric}: {reference[metric]:.4g} -> {measures[metric]:.4g} (+{(ratio - 1) * 100:.0f}%)")
+        if measures['html_bytes'] != reference['html_bytes']:
+            regressions.append(f"{rows} righe, html_bytes: {reference['html_bytes']} -> {measures['html_bytes']} (output cambiato)")
+    return regressions
+
+def suite(sizes, repeat=3, baseline_file=BASELINE_FILE, tolerance=0.25, save_baseline=False):
+    """
+    Esegue la suite e la confronta con la baseline (o la salva); restituisce il codice di uscita
+    """
+    results = run_suite(sizes, repeat=repeat)
+    
+    if save_baseline:
+        with open(baseline_file, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'pandas': pd.__version__, 'machine': platform.machine(),
+                       'results': results}, f, indent=2)
+        print(f"Baseline salvata in {baseline_file}")
+        return 0
+    
+    if not os.path.exists(baseline_file):
+        # Senza baseline non c'è niente con cui confrontare: il controllo non può passare
+        print(f"❌ Nessuna baseline in {baseline_file}: salvala con --save-baseline sulla stessa macchina")
+        return 1
+    
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline['results'], tolerance)
+    if regressions:
+        print(f"\n❌ Regressioni rispetto a {baseline_file} (tolleranza {tolerance * 100:.0f}%):")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+    print(f"\n✅ Nessuna regressione rispetto a {baseline_file}")
+    return 0
+
+# Fogli con celle scritte come testo ("1", " 4.5 "), booleani e righe vuote in mezzo:
+# pd.read_excel converte in numeri le colonne i cui testi sono tutti numeri
+TEXT_CELLS_SHEETS = {
+    "Menu testo": [["Menu", "Birra", "Birrificio", 0.4, 0.2],
+                   ["1", "Stout", "Alpha", "5", 3.5], ["0", "Lager", None, 4.5, "3"],
+                   [" 1 ", "IPA", "Beta", " 6.5 ", None], ["1.0", "123", "Alpha", 7, "2.5"]],
+    "Menu misto": [["Menu", "Nome", "Prezzo"],
+                   [1, "Gin", "7"], ["1", "Rum", 8], ["si", "Vodka", "7-9"], [True, "Sake", 6]],
+    "Prezzi testo": [["Menu", "Nome", "Prezzo", "Note"],
+                     [1, "Spritz", "6", "TRUE"], [None, None, None, None], [1, "Negroni", "1e1", True],
+                     [0, "Mojito", "inf", None], [1, "007", "8", "x"]],
+    "Senza Menu": [["Nome", "Prezzo"], ["Acqua", "2"], [None, None], ["Coca", True], [None, None]],
+}
+
+def make_text_cells_workbook(path):
+    """
+    Scrive un file Excel con celle di testo numeriche, booleani e righe vuote,
+    i casi in cui i tipi delle celle non coincidono con quelli delle colonne lette da pandas
+    """
+    workbook = Workbook(write_only=True)
+    for sheet_name, rows in TEXT_CELLS_SHEETS.items():
+        worksheet = workbook.create_sheet(sheet_name)
+        for row in rows:
+            worksheet.append(row)
+    workbook.save(path)
+    return path
+
+def same_sheets(legacy_data, new_data):
+    """
+    Verifica che i due loader abbiano restituito gli stessi fogli con gli stessi dati
+    """
+    if list(legacy_data) != list(new_data):
+        print(f"Fogli diversi: {list(legacy_data)} != {list(new_data)}")
+        return False
+    for sheet_name, df in new_data.items():
+        try:
+            # Le colonne categoriche del loader attuale si confrontano per valore
+            plain = df.apply(lambda column: column.astype(object) if isinstance(column.dtype, pd.CategoricalDtype) else column)
+            pd.testing.assert_frame_equal(legacy_data[sheet_name][df.columns], plain, check_dtype=False)
+        except AssertionError as e:
+            print(f"Differenza nel foglio '{sheet_name}': {e}")
+            return False
+    return True
+
+def compare_loaders(file_path, repeat=5):
+    """
+    Confronta il loader attuale con quello precedente e verifica che i dati coincidano,
+    sul file indicato e su un workbook con celle di testo numeriche
+    """
+    legacy_best, legacy_mean, legacy_data = time_call(read_all_excel_sheets_legacy, file_path, repeat=repeat)
+    new_best, new_mean, new_data = time_call(read_all_excel_sheets, file_path, repeat=repeat)
+    
+    print(f"File: {file_path} ({os.path.getsize(file_path) / 1024:.1f} KB)")
+    print(f"{'Loader':<28}{'migliore':>12}{'medio':>12}")
+    print(f"{'pd.read_excel per foglio':<28}{legacy_best * 1000:>10.1f}ms{legacy_mean * 1000:>10.1f}ms")
+    print(f"{'openpyxl read-only':<28}{new_best * 1000:>10.1f}ms{new_mean * 1000:>10.1f}ms")
+    print(f"Speedup: {legacy_best / new_best:.2f}x")
+    
+    same_data = same_sheets(legacy_data, new_data)
+    print(f"Stessi dati del loader precedente: {'sì' if same_data else 'NO'}")
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        text_file = make_text_cells_workbook(os.path.join(work_dir, "celle_testo.xlsx"))
+        _, _, legacy_text = time_call(read_all_excel_sheets_legacy, text_file, repeat=1)
+        _, _, new_text = time_call(read_all_excel_sheets, text_file, repeat=1)
+        same_text = same_sheets(legacy_text, new_text)
+    print(f"Stessi dati con celle di testo numeriche: {'sì' if same_text else 'NO'}")
+    return same_data and same_text
+
+def compare_renderers(rows=10000, repeat=3):
+    """
+    Confronta il renderer per colonne con quello precedente (df.iterrows) su fogli sintetici
+    e verifica che l'HTML prodotto sia identico byte per byte
+    """
+    layouts = [('spina', "Birre Spina"), ('misure', "Calici"), ('prezzo', "Gin Tonic")]
+    all_identical = True
+    print(f"{'Layout':<14}{'righe':>8}{'iterrows':>12}{'colonne':>12}{'speedup':>10}  identico")
+    for layout, sheet_name in layouts:
+        df = make_synthetic_sheet(layout, rows)
+        legacy_best, _, legacy_html = time_call(render_sheet_section_legacy, sheet_name, df, repeat=repeat)
+        new_best, _, new_html = time_call(render_sheet_section, sheet_name, df, repeat=repeat)
+        identical = legacy_html == new_html
+        all_identical = all_identical and identical
+        print(f"{layout:<14}{rows:>8}{legacy_best * 1000:>10.1f}ms{new_best * 1000:>10.1f}ms"
+              f"{legacy_best / new_best:>9.1f}x  {'sì' if identical else 'NO'}")
+    return all_identical
+
+def main():
+    """
+    Funzione principale del benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark della pipeline del menu The Craft")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    loader_parser = subparsers.add_parser("loader", help="confronta il loader attuale con quello precedente")
+    loader_parser.add_argument("excel_file", nargs="?", default="menu The Craft.xlsx", help="file Excel da leggere")
+    loader_parser.add_argument("--repeat", type=int, default=5, help="numero di ripetizioni per ogni misura")
+    
+    render_parser = subparsers.add_parser("render", help="confronta il renderer per colonne con quello basato su iterrows")
+    render_parser.add_argument("--rows", type=int, default=10000, help="righe di ogni foglio sintetico")
+    render_parser.add_argument("--repeat", type=int, default=3, help="numero di ripetizioni per ogni misura")
+    
+    suite_parser = subparsers.add_parser("suite", help="misura lettura e generazione su workbook sintetici e confronta con la baseline")
+    suite_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000], help="righe totali dei workbook sintetici (fino a 100000)")
+    suite_parser.add_argument("--repeat", type=int, default=3, help="numero di ripetizioni per ogni misura")
+    suite_parser.add_argument("--baseline", default=BASELINE_FILE, help="file JSON della baseline")
+    suite_parser.add_argument("--tolerance", type=float, default=0.25, help="peggioramento tollerato rispetto alla baseline (0.25 = +25%%)")
+    suite_parser.add_argument("--save-baseline", action="store_true", help="salva i risultati come nuova baseline")
+    
+    workbook_parser = subparsers.add_parser("workbook", help="scrive un file Excel sintetico")
+    workbook_parser.add_argument("excel_file", help="file Excel da creare")
+    workbook_parser.add_argument("--rows", type=int, default=1000, help="righe totali tra i fogli")
+    workbook_parser.add_argument("--seed", type=int, default=0, help="seme dei dati casuali")
+    
+    args = parser.parse_args()
+    
+    if args.command == "loader":
+        if not os.path.exists(args.excel_file):
+            print(f"Errore: Il file {args.excel_file} non esiste!")
+            return 1
+        return 0 if compare_loaders(args.excel_file, repeat=args.repeat) else 1
+    elif args.command == "render":
+        return 0 if compare_renderers(rows=args.rows, repeat=args.repeat) else 1
+    elif args.command == "suite":
+        return suite(args.sizes, repeat=args.repeat, baseline_file=args.baseline, tolerance=args.tolerance,
+                     save_baseline=args.save_baseline)
+    elif args.command == "workbook":
+        make_synthetic_workbook(args.excel_file, args.rows, seed=args.seed)
+        print(f"File creato: {args.excel_file}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Menu Build Cache - Manifest della cache di build e controllo rapido dei file di input.
+Usa solo la libreria standard, così menu_generator_complete.py può decidere se serve
+una build senza caricare il generatore (menu_generator_core.py) né pandas
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+
+def _lazy_import(name):
+    """
+    Prepara un modulo che viene davvero importato solo al primo utilizzo, oppure None se non è installato.
+    pandas, numpy, openpyxl & co. costano centinaia di millisecondi e non servono quando la build
+    può essere saltata (vedi inputs_unchanged)
+    """
+    try:
+        spec = importlib.util.find_spec(name)
+    except ImportError:
+        spec = None
+    if spec is None:
+        return None
+    if name in sys.modules:
+        return sys.modules[name]
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    # Come fa import: il sottomodulo diventa attributo del pacchetto (es. concurrent.futures)
+    parent, _, child = name.rpartition('.')
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
+
+# tempfile serve solo quando un file viene riscritto, non nel controllo rapido
+tempfile = _lazy_import('tempfile')
+
+# Cartella predefinita degli snapshot dei dati filtrati
+SNAPSHOT_DIR = ".menu_snapshots"
+
+def _file_signature(path):
+    """
+    Firma economica di un file (data di modifica e dimensione), None se il file non esiste
+    """
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def _file_digest(path):
+    """
+    Hash sha256 del contenuto di un file, letto a blocchi
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _fsync_directory(directory):
+    """
+    Rende persistente su disco il rename appena fatto nella cartella (dove il sistema lo permette)
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # es. Windows, dove le cartelle non si aprono così
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_file_atomic(path, content):
+    """
+    Scrive il file (bytes, una stringa o un iterabile di frammenti) in un file temporaneo nella stessa cartella,
+    lo porta su disco con fsync e poi lo sostituisce al file di destinazione con un rename atomico:
+    chi legge vede sempre un file completo. Se il contenuto è identico a quello del file esistente
+    il rename non avviene, così data di modifica, ETag e cache restano validi.
+    Restituisce True se il file è stato sostituito, False se era già aggiornato
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        stat = os.stat(path)
+        mode = stat.st_mode & 0o777
+    except OSError:
+        stat = None
+        mode = 0o644
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        if isinstance(content, bytes):
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                if isinstance(content, str):
+                    f.write(content)
+                else:
+                    f.writelines(content)
+                f.flush()
+                os.fsync(f.fileno())
+        
+        # Stesso contenuto del file esistente: niente rename
+        if stat is not None and stat.st_size == os.path.getsize(temp_path) and _file_digest(temp_path) == _file_digest(path):
+            os.unlink(temp_path)
+            return False
+        
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    _fsync_directory(directory)
+    return True
+
+# File del programma: se uno cambia, cache di build e snapshot vengono invalidati
+GENERATOR_FILES = ('menu_generator_complete.py', 'menu_generator_core.py', 'menu_build_cache.py')
+
+def _renderer_fingerprint():
+    """
+    Impronta del codice del generatore: se il programma cambia, la cache viene invalidata
+    """
+    fingerprint = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for file_name in GENERATOR_FILES:
+        with open(os.path.join(directory, file_name), 'rb') as f:
+            fingerprint.update(f.read())
+    return fingerprint.hexdigest()
+
+def build_cache_path(output_file):
+    """
+    Percorso del manifest della cache di build, accanto al file HTML generato
+    """
+    directory, file_name = os.path.split(output_file)
+    return os.path.join(directory, f".{file_name}.cache.json")
+
+def load_build_cache(cache_file):
+    """
+    Carica il manifest della cache di build; se manca, è illeggibile o è stato
+    creato da un'altra versione del generatore, restituisce una cache vuota
+    """
+    fingerprint = _renderer_fingerprint()
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('renderer') == fingerprint:
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {'renderer': fingerprint, 'page': None, 'sections': {}}
+
+def save_build_cache(cache_file, cache):
+    """
+    Salva il manifest della cache di build
+    """
+    try:
+        write_file_atomic(cache_file, json.dumps(cache, ensure_ascii=False))
+    except OSError as e:
+        print(f"Errore nel salvataggio della cache di build: {e}")
+
+def record_build_inputs(output_file, excel_file, logo_path, options, outputs=()):
+    """
+    Salva nel manifest della cache di build la firma (data di modifica, dimensione e hash)
+    del file Excel e del logo usati, le opzioni e i file prodotti, per il controllo rapido
+    di inputs_unchanged alla prossima esecuzione
+    """
+    cache_file = build_cache_path(output_file)
+    cache = load_build_cache(cache_file)
+    files = {}
+    for path in (excel_file, logo_path):
+        signature = _file_signature(path)
+        files[os.path.abspath(path)] = {'signature': list(signature), 'sha256': _file_digest(path)} if signature else None
+    cache['inputs'] = {'options': options, 'files': files, 'outputs': [os.path.abspath(path) for path in outputs]}
+    save_build_cache(cache_file, cache)
+
+def inputs_unchanged(output_file, excel_file, logo_path, options):
+    """
+    Controllo rapido prima di ogni build, senza importare pandas o openpyxl: True se generatore,
+    opzioni, file Excel e logo sono gli stessi dell'ultima build e i file prodotti esistono ancora.
+    Se cambia solo la data di modifica (es. file ricopiato) si confronta l'hash del contenuto
+    """
+    cache_file = build_cache_path(output_file)
+    cache = load_build_cache(cache_file)
+    inputs = cache.get('inputs')
+    if not inputs or inputs['options'] != options:
+        return False
+    if not all(os.path.exists(path) for path in inputs['outputs'] or [output_file]):
+        return False
+    
+    refreshed = False
+    for path in (excel_file, logo_path):
+        key = os.path.abspath(path)
+        if key not in inputs['files']:
+            return False
+        stored = inputs['files'][key]
+        signature = _file_signature(path)
+        if stored is None or signature is None:
+            if stored is None and signature is None:
+                continue
+            return False
+        if list(signature) == stored['signature']:
+            continue
+        if _file_digest(path) != stored['sha256']:
+            return False
+        stored['signature'] = list(signature)
+        refreshed = True
+    
+    # Contenuto invariato: la prossima volta basta di nuovo la data di modifica
+    if refreshed:
+        save_build_cache(cache_file, cache)
+    return True
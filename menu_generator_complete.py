@@ -1,597 +1,109 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Menu Generator Complete - Converte tutti i fogli Excel in HTML responsive per smartphone
+Menu Generator Complete - Converte tutti i fogli Excel in HTML responsive per smartphone.
+Punto di ingresso leggero: se file Excel, logo e opzioni non sono cambiati dall'ultima build
+termina subito, altrimenti carica il generatore (menu_generator_core.py)
 """
 
-import pandas as pd
+import argparse
 import os
-import base64
-from datetime import datetime
+import sys
 
-def get_logo_base64(logo_path="The_Craft_logo.png"):
+from menu_build_cache import SNAPSHOT_DIR, _file_signature, _lazy_import, inputs_unchanged
+
+# Il generatore (con pandas & co.) viene importato solo se c'è davvero da lavorare
+generator = _lazy_import('menu_generator_core')
+
+def parse_args(argv=None):
     """
-    Converte il logo in BASE64 per l'inserimento nell'HTML
+    Legge le opzioni della riga di comando
     """
-    try:
-        if os.path.exists(logo_path):
-            with open(logo_path, 'rb') as f:
-                logo_data = base64.b64encode(f.read()).decode('utf-8')
-                return f"data:image/png;base64,{logo_data}"
-        else:
-            print(f"Logo non trovato: {logo_path}")
-            return ""
-    except Exception as e:
-        print(f"Errore nella conversione del logo: {e}")
-        return ""
+    parser = argparse.ArgumentParser(description="Genera il menu HTML completo di The Craft dal file Excel")
+    parser.add_argument("--excel", default="menu The Craft.xlsx", help="file Excel con i dati del menu")
+    parser.add_argument("--output", default="menu_completo_the_craft.html", help="file HTML da generare")
+    parser.add_argument("--logo", default="The_Craft_logo.png", help="logo da inserire nell'intestazione")
+    parser.add_argument("--logo-external", action="store_true", help="scrive il logo come file separato con l'hash nel nome invece di inserirlo nell'HTML")
+    parser.add_argument("--logo-max-width", type=int, default=None, help="ridimensiona e ricomprime il logo a questa larghezza in pixel (richiede Pillow)")
+    parser.add_argument("--minify", action="store_true", help="minifica CSS e markup dell'HTML generato")
+    parser.add_argument("--precompress", action="store_true", help="scrive anche le versioni .gz e .br dell'HTML alla massima compressione")
+    parser.add_argument("--lazy-sections", action="store_true", help="inserisce subito solo la prima sezione e costruisce le altre quando servono")
+    parser.add_argument("--data-export", action="store_true", help="scrive una pagina guscio e i dati del menu in un file JSON compatto")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="più dettagli: -v colonne e prime righe di ogni foglio, -vv anche i tempi di ogni fase")
+    parser.add_argument("--timings", default=None, help="scrive in questo file JSON i tempi, le righe e i byte di ogni fase")
+    parser.add_argument("--profile", default=None, help="scrive in questo file il profilo cProfile della generazione (e i tempi per fase)")
+    parser.add_argument("--change-feed", action="store_true", help="scrive anche un JSON con gli articoli aggiunti, rimossi o cambiati dalla build precedente")
+    parser.add_argument("--search", action="store_true", help="aggiunge una casella di ricerca e scrive accanto alla pagina il suo indice JSON")
+    parser.add_argument("--export", default="", help="altri formati da scrivere dallo stesso modello, separati da virgole (es. print,text)")
+    parser.add_argument("--plugin", action="append", default=[],
+                        help="file .py che registra altri formati con register_exporter (ripetibile)")
+    parser.add_argument("--export-jobs", type=int, default=None, help="processi con cui scrivere in parallelo i formati di --export")
+    parser.add_argument("--shard", action="store_true",
+                        help="una pagina per foglio più una pagina indice, con il CSS in un file condiviso e il logo esterno")
+    parser.add_argument("--page-size", type=int, default=None, help="con --shard divide i fogli più lunghi in pagine di al massimo N righe")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, help="cartella degli snapshot colonnari dei dati filtrati (richiede pyarrow)")
+    parser.add_argument("--no-snapshot", action="store_true", help="legge sempre il file Excel senza usare gli snapshot")
+    parser.add_argument("--watch", action="store_true", help="resta in ascolto e rigenera il menu a ogni salvataggio del file Excel o del logo")
+    parser.add_argument("--interval", type=float, default=0.2, help="intervallo di controllo dei file in secondi (modalità watch)")
+    
+    subparsers = parser.add_subparsers(dest="command")
+    batch_parser = subparsers.add_parser("batch", help="genera in parallelo i menu di più file Excel")
+    batch_parser.add_argument("workbooks", nargs="+", help="file Excel, glob (es. \"locali/*.xlsx\") o coppie EXCEL=HTML")
+    batch_parser.add_argument("--output-dir", default=".", help="cartella dei file HTML generati")
+    batch_parser.add_argument("--jobs", type=int, default=None, help="numero di processi (predefinito: numero di CPU)")
+    
+    serve_parser = subparsers.add_parser("serve", help="serve il menu via HTTP tenendolo in memoria e aggiornandolo quando cambia il file Excel")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="indirizzo di ascolto (0.0.0.0 per i dispositivi della rete locale)")
+    serve_parser.add_argument("--port", type=int, default=8000, help="porta di ascolto")
+    
+    cache_parser = subparsers.add_parser("cache", help="prepara o cancella gli snapshot dei dati filtrati")
+    cache_parser.add_argument("action", choices=["warm", "clear"], help="warm: crea gli snapshot dei file Excel, clear: li cancella tutti")
+    cache_parser.add_argument("workbooks", nargs="*", help="file Excel o glob da preparare (predefinito: --excel)")
+    return parser.parse_args(argv)
 
-def read_all_excel_sheets(file_path):
+def get_output_options(args):
     """
-    Legge tutti i fogli del file Excel e restituisce un dizionario con i dati
+    Opzioni di generate_complete_html_menu scelte sulla riga di comando
     """
-    try:
-        excel_file = pd.ExcelFile(file_path)
-        sheet_names = excel_file.sheet_names
-        
-        print(f"Fogli trovati: {sheet_names}")
-        
-        sheets_data = {}
-        for sheet_name in sheet_names:
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
-            if not df.empty:
-                # Filtra solo le righe con Menu = 1
-                if 'Menu' in df.columns:
-                    df_filtered = df[df['Menu'] == 1]
-                    print(f"\nFoglio '{sheet_name}':")
-                    print(f"Colonne: {list(df.columns)}")
-                    print(f"Righe totali: {len(df)}, Righe con Menu=1: {len(df_filtered)}")
-                    if not df_filtered.empty:
-                        sheets_data[sheet_name] = df_filtered
-                        print(f"Prime righe filtrate:\n{df_filtered.head()}")
-                    else:
-                        print(f"Nessuna riga con Menu=1 trovata per '{sheet_name}'")
-                else:
-                    sheets_data[sheet_name] = df
-                    print(f"\nFoglio '{sheet_name}':")
-                    print(f"Colonne: {list(df.columns)}")
-                    print(f"Righe: {len(df)}")
-                    print(f"Prime righe:\n{df.head()}")
-        
-        return sheets_data
-        
-    except Exception as e:
-        print(f"Errore nella lettura del file Excel: {e}")
-        return None
+    exports = [name.strip() for name in args.export.split(',') if name.strip()]
+    return {'minify': args.minify, 'precompress': args.precompress, 'lazy_sections': args.lazy_sections,
+            'data_export': args.data_export, 'change_feed': args.change_feed,
+            'shard': args.shard or bool(args.page_size), 'page_size': args.page_size, 'search': args.search,
+            'exports': exports, 'export_jobs': args.export_jobs}
 
-def generate_complete_html_menu(sheets_data, output_file="menu_completo.html"):
+def get_build_options(args, output_options):
     """
-    Genera un file HTML responsive completo con tutti i fogli
+    Opzioni registrate nel manifest della cache di build: se cambiano, serve una nuova build
     """
-    
-    # Template HTML con CSS responsive
-    html_template = """<!DOCTYPE html>
-<html lang="it">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Menu Completo The Craft</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 10px;
-        }}
-        
-        .container {{
-            max-width: 100%;
-            margin: 0 auto;
-            background: white;
-            border-radius: 15px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.3);
-            overflow: hidden;
-        }}
-        
-        .header {{
-            background: linear-gradient(45deg, #f39c12, #e67e22);
-            color: white;
-            text-align: center;
-            padding: 20px;
-        }}
-        
-        .header h1 {{
-            font-size: 2em;
-            margin-bottom: 10px;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-        }}
-        
-        .header p {{
-            font-size: 1em;
-            opacity: 0.9;
-        }}
-        
-        .logo {{
-            width: 100%;
-            height: auto;
-            margin: 0 auto 20px auto;
-            display: block;
-            border-radius: 15px;
-            background: white;
-            padding: 20px;
-            box-shadow: 0 6px 12px rgba(0,0,0,0.3);
-            border: 3px solid #2c3e50;
-            max-width: 100%;
-        }}
-        
-        .menu-section {{
-            padding: 20px;
-            border-bottom: 1px solid #eee;
-        }}
-        
-        .menu-section:last-child {{
-            border-bottom: none;
-        }}
-        
-        .section-title {{
-            font-size: 1.4em;
-            color: #2c3e50;
-            margin-bottom: 15px;
-            text-align: center;
-            border-bottom: 3px solid #f39c12;
-            padding-bottom: 10px;
-            background: linear-gradient(45deg, #f39c12, #e67e22);
-            color: white;
-            padding: 12px;
-            border-radius: 10px;
-            margin: 15px 0;
-            position: relative;
-        }}
-        
-        .back-to-top {{
-            position: absolute;
-            right: 15px;
-            top: 50%;
-            transform: translateY(-50%);
-            color: white;
-            text-decoration: none;
-            font-size: 1.2em;
-            background: rgba(255,255,255,0.2);
-            padding: 8px;
-            border-radius: 50%;
-            transition: all 0.3s ease;
-            width: 32px;
-            height: 32px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }}
-        
-        .back-to-top:hover {{
-            background: rgba(255,255,255,0.3);
-            transform: translateY(-50%) scale(1.1);
-        }}
-        
-        .menu-item {{
-            display: flex;
-            flex-direction: column;
-            align-items: flex-start;
-            padding: 12px;
-            margin: 8px 0;
-            background: #f8f9fa;
-            border-radius: 8px;
-            border-left: 3px solid #3498db;
-            transition: all 0.3s ease;
-        }}
-        
-        .menu-item:hover {{
-            transform: translateX(5px);
-            box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-        }}
-        
-        .item-header {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            width: 100%;
-            margin-bottom: 4px;
-        }}
-        
-        .item-name {{
-            font-weight: bold;
-            font-size: 1em;
-            color: #2c3e50;
-            flex: 1;
-            word-wrap: break-word;
-            line-height: 1.3;
-        }}
-        
-        .item-producer {{
-            font-weight: bold;
-            font-size: 1em;
-            color: #2c3e50;
-        }}
-        
-        .item-price {{
-            font-size: 1.1em;
-            font-weight: bold;
-            color: #e74c3c;
-            margin-left: 15px;
-            white-space: nowrap;
-            flex-shrink: 0;
-        }}
-        
-        .price-table {{
-            display: table;
-            width: 100%;
-            margin-top: 10px;
-        }}
-        
-        .price-header {{
-            display: table-header-group;
-            background: #ecf0f1;
-            border-radius: 5px;
-        }}
-        
-        .price-row {{
-            display: table-row;
-        }}
-        
-        .price-cell {{
-            display: table-cell;
-            padding: 6px 10px;
-            text-align: center;
-            border-right: 1px solid #bdc3c7;
-            font-weight: bold;
-            color: #2c3e50;
-            font-size: 0.9em;
-        }}
-        
-        .price-cell:last-child {{
-            border-right: none;
-        }}
-        
-        .price-value {{
-            font-size: 1em;
-            font-weight: bold;
-            color: #e74c3c;
-        }}
-        
-        .item-description {{
-            font-size: 0.8em;
-            color: #7f8c8d;
-            margin-top: 4px;
-            font-style: italic;
-        }}
-        
-        
-        .footer {{
-            background: #2c3e50;
-            color: white;
-            text-align: center;
-            padding: 15px;
-            font-size: 0.8em;
-        }}
-        
-        @media (max-width: 480px) {{
-            .header h1 {{
-                font-size: 1.6em;
-            }}
-            
-            .logo {{
-                width: 100%;
-                height: auto;
-                padding: 15px;
-            }}
-            
-            .item-header {{
-                flex-direction: column;
-                align-items: flex-start;
-            }}
-            
-            .item-price {{
-                margin-left: 0;
-                margin-top: 5px;
-                align-self: flex-end;
-            }}
-        }}
-        
-        .no-data {{
-            text-align: center;
-            padding: 40px;
-            color: #7f8c8d;
-            font-style: italic;
-        }}
-        
-        .navigation {{
-            background: #34495e;
-            padding: 15px;
-            text-align: center;
-        }}
-        
-        .nav-link {{
-            color: white;
-            text-decoration: none;
-            margin: 5px 8px;
-            padding: 8px 12px;
-            border-radius: 8px;
-            background: #f39c12;
-            transition: all 0.3s ease;
-            display: inline-block;
-            font-size: 0.9em;
-            font-weight: 500;
-        }}
-        
-        .nav-link:hover {{
-            background: #e67e22;
-            transform: translateY(-2px);
-            box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header" id="top">
-            <img src="LOGO_PLACEHOLDER" alt="The Craft Logo" class="logo">
-            <h1>🍽️ Menu Completo The Craft</h1>
-            <p>Esperienza culinaria unica</p>
-        </div>
-        
-        <div class="navigation">
-            {navigation_links}
-        </div>
-        
-        {menu_content}
-        
-        <div class="footer">
-            <p>Generato il {date} | Menu The Craft</p>
-        </div>
-    </div>
-</body>
-</html>"""
-    
-    # Genera il contenuto del menu
-    menu_content = ""
-    navigation_links = ""
-    
-    if sheets_data:
-        # Crea i link di navigazione
-        for sheet_name in sheets_data.keys():
-            section_id = sheet_name.lower().replace(" ", "_")
-            navigation_links += f'<a href="#{section_id}" class="nav-link">{sheet_name}</a>'
-        
-        # Genera il contenuto per ogni foglio
-        for sheet_name, df in sheets_data.items():
-            section_id = sheet_name.lower().replace(" ", "_")
-            menu_content += f'<div class="menu-section" id="{section_id}">\n'
-            menu_content += f'<h2 class="section-title">{sheet_name} <a href="#top" class="back-to-top">↑</a></h2>\n'
-            
-            # Identifica le colonne (escludendo la colonna Menu)
-            name_column = None
-            price_column = None
-            description_column = None
-            brewery_column = None
-            tipo_column = None
-            caratteristica_column = None
-            
-            for col in df.columns:
-                if col == 'Menu':  # Salta la colonna Menu
-                    continue
-                col_lower = str(col).lower()
-                # Controlla prima le colonne specifiche per evitare conflitti
-                if any(word in col_lower for word in ['gineria', 'sidreria', 'birrificio', 'brewery', 'produttore', 'producer']):
-                    brewery_column = col
-                elif any(word in col_lower for word in ['tipo']):
-                    tipo_column = col
-                elif any(word in col_lower for word in ['caratteristica']):
-                    caratteristica_column = col
-                elif any(word in col_lower for word in ['nome', 'name', 'piatto', 'dish', 'prodotto', 'product', 'birra', 'bevanda', 'sidro', 'gin']):
-                    name_column = col
-                elif any(word in col_lower for word in ['prezzo', 'price', 'costo', 'cost', '€', 'euro']) or isinstance(col, (int, float)):
-                    price_column = col
-                elif any(word in col_lower for word in ['descrizione', 'description', 'dettagli', 'details', 'stile']):
-                    description_column = col
-            
-            # Se non troviamo colonne specifiche, usa le prime colonne disponibili
-            available_cols = [col for col in df.columns if col != 'Menu']
-            
-            if not name_column and len(available_cols) > 0:
-                name_column = available_cols[0]
-            if not price_column and len(available_cols) > 1:
-                price_column = available_cols[1]
-            if not description_column and len(available_cols) > 2:
-                # Evita di usare la stessa colonna del nome come descrizione
-                for col in available_cols[2:]:
-                    if col != name_column and col != price_column and col != brewery_column:
-                        description_column = col
-                        break
-            if not brewery_column and len(available_cols) > 3:
-                # Evita di usare colonne già assegnate
-                for col in available_cols[3:]:
-                    if col != name_column and col != price_column and col != description_column:
-                        brewery_column = col
-                        break
-            
-            
-            # Controlla se abbiamo colonne di prezzo numeriche (per diverse misure)
-            price_columns = [col for col in df.columns if isinstance(col, (int, float)) and pd.notna(col) and col != 'Menu']
-            
-            if price_columns:
-                # Caso speciale: menu con diverse misure/prezzi
-                if sheet_name == "Birre Spina":
-                    # Layout speciale per Birre Spina con tabella prezzi
-                    menu_content += '<div class="price-table">\n'
-                    menu_content += '<div class="price-header">\n'
-                    menu_content += '<div class="price-row">\n'
-                    
-                    # Prima colonna vuota per le intestazioni
-                    menu_content += '<div class="price-cell"></div>\n'
-                    
-                    # Intestazioni delle colonne (spostate a destra di una posizione, ordine decrescente)
-                    for price_col in sorted(price_columns, reverse=True):
-                        menu_content += f'<div class="price-cell">{price_col}L</div>\n'
-                    
-                    menu_content += '</div>\n'
-                    menu_content += '</div>\n'
-                    
-                    # Righe dei prezzi per ogni birra
-                    for _, row in df.iterrows():
-                        name = row[name_column] if name_column and pd.notna(row[name_column]) else "Nome non disponibile"
-                        description = row[description_column] if description_column and pd.notna(row[description_column]) else ""
-                        brewery = row[brewery_column] if brewery_column and pd.notna(row[brewery_column]) else ""
-                        
-                        menu_content += '<div class="price-row">\n'
-                        
-                        # Nome della birra nella prima colonna
-                        if brewery:
-                            menu_content += f'<div class="price-cell" style="text-align: left; font-weight: bold;">{name} - {brewery}</div>\n'
-                        else:
-                            menu_content += f'<div class="price-cell" style="text-align: left; font-weight: bold;">{name}</div>\n'
-                        
-                        # Prezzi per ogni misura (ordine decrescente)
-                        for price_col in sorted(price_columns, reverse=True):
-                            if pd.notna(row[price_col]):
-                                menu_content += f'<div class="price-cell"><span class="price-value">€{row[price_col]}</span></div>\n'
-                            else:
-                                menu_content += '<div class="price-cell">-</div>\n'
-                        
-                        menu_content += '</div>\n'
-                        
-                        # Descrizione sotto la riga
-                        if description:
-                            menu_content += f'<div class="item-description" style="padding: 4px 0; font-style: italic; color: #7f8c8d; font-size: 0.8em;">{description}</div>\n'
-                    
-                    menu_content += '</div>\n'
-                else:
-                    # Layout normale per altri fogli con prezzi multipli
-                    for _, row in df.iterrows():
-                        name = row[name_column] if name_column and pd.notna(row[name_column]) else "Nome non disponibile"
-                        description = row[description_column] if description_column and pd.notna(row[description_column]) else ""
-                        brewery = row[brewery_column] if brewery_column and pd.notna(row[brewery_column]) else ""
-                        tipo = row[tipo_column] if tipo_column and pd.notna(row[tipo_column]) else ""
-                        caratteristica = row[caratteristica_column] if caratteristica_column and pd.notna(row[caratteristica_column]) else ""
-                        
-                        menu_content += f'<div class="menu-item">\n'
-                        
-                        # Header con nome e prezzo
-                        menu_content += f'<div class="item-header">\n'
-                        
-                        # Combina nome e produttore nella stessa riga
-                        if brewery:
-                            menu_content += f'<div class="item-name">{name} - <span class="item-producer">{brewery}</span></div>\n'
-                        else:
-                            menu_content += f'<div class="item-name">{name}</div>\n'
-                        
-                        # Mostra i prezzi per le diverse misure
-                        prices_text = ""
-                        for price_col in sorted(price_columns):
-                            if pd.notna(row[price_col]):
-                                prices_text += f"{price_col}L: €{row[price_col]} "
-                        
-                        menu_content += f'<div class="item-price">{prices_text.strip()}</div>\n'
-                        menu_content += f'</div>\n'
-                        
-                        # Gestisci le descrizioni multiple per Gin Tonic
-                        if tipo and caratteristica:
-                            menu_content += f'<div class="item-description">{tipo} - {caratteristica}</div>\n'
-                        elif tipo:
-                            menu_content += f'<div class="item-description">{tipo}</div>\n'
-                        elif caratteristica:
-                            menu_content += f'<div class="item-description">{caratteristica}</div>\n'
-                        elif description:
-                            menu_content += f'<div class="item-description">{description}</div>\n'
-                        
-                        menu_content += f'</div>\n'
-            else:
-                # Caso normale: un prezzo per articolo
-                for _, row in df.iterrows():
-                    name = row[name_column] if name_column and pd.notna(row[name_column]) else "Nome non disponibile"
-                    price = row[price_column] if price_column and pd.notna(row[price_column]) else "Prezzo non disponibile"
-                    description = row[description_column] if description_column and pd.notna(row[description_column]) else ""
-                    brewery = row[brewery_column] if brewery_column and pd.notna(row[brewery_column]) else ""
-                    tipo = row[tipo_column] if tipo_column and pd.notna(row[tipo_column]) else ""
-                    caratteristica = row[caratteristica_column] if caratteristica_column and pd.notna(row[caratteristica_column]) else ""
-                    
-                    menu_content += f'<div class="menu-item">\n'
-                    
-                    # Header con nome e prezzo
-                    menu_content += f'<div class="item-header">\n'
-                    
-                    # Combina nome e produttore nella stessa riga
-                    if brewery:
-                        menu_content += f'<div class="item-name">{name} - <span class="item-producer">{brewery}</span></div>\n'
-                    else:
-                        menu_content += f'<div class="item-name">{name}</div>\n'
-                    
-                    menu_content += f'<div class="item-price">{price}</div>\n'
-                    menu_content += f'</div>\n'
-                    
-                    # Gestisci le descrizioni multiple per Gin Tonic
-                    if tipo and caratteristica:
-                        menu_content += f'<div class="item-description">{tipo} - {caratteristica}</div>\n'
-                    elif tipo:
-                        menu_content += f'<div class="item-description">{tipo}</div>\n'
-                    elif caratteristica:
-                        menu_content += f'<div class="item-description">{caratteristica}</div>\n'
-                    elif description:
-                        menu_content += f'<div class="item-description">{description}</div>\n'
-                    
-                    menu_content += f'</div>\n'
-            
-            menu_content += f'</div>\n'
-    else:
-        menu_content = '<div class="no-data">Nessun dato disponibile nel menu</div>'
-    
-    # Completa il template HTML
-    current_date = datetime.now().strftime("%d/%m/%Y %H:%M")
-    logo_base64 = get_logo_base64()
-    
-    html_content = html_template.format(
-        menu_content=menu_content,
-        navigation_links=navigation_links,
-        date=current_date
-    )
-    
-    # Sostituisce il placeholder del logo con il BASE64
-    if logo_base64:
-        html_content = html_content.replace("LOGO_PLACEHOLDER", logo_base64)
-    else:
-        html_content = html_content.replace('<img src="LOGO_PLACEHOLDER" alt="The Craft Logo" class="logo">', '')
-    
-    # Salva il file HTML
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    
-    print(f"Menu HTML completo generato con successo: {output_file}")
-    return output_file
+    # Nella modalità a pagine il logo è un file esterno, come il CSS, invece di essere ripetuto in ogni pagina
+    logo_external = args.logo_external or output_options['shard']
+    # Se un plugin cambia (data di modifica o dimensione) i suoi formati vanno riscritti
+    plugins = {os.path.abspath(path): list(_file_signature(path) or []) for path in args.plugin}
+    return dict(output_options, logo=os.path.abspath(args.logo), logo_external=logo_external,
+                logo_max_width=args.logo_max_width, plugins=plugins)
 
-def main():
+def main(argv=None):
     """
     Funzione principale del programma
     """
-    excel_file = "menu The Craft.xlsx"
+    args = parse_args(argv)
+    output_options = get_output_options(args)
+    build_options = get_build_options(args, output_options)
     
-    if not os.path.exists(excel_file):
-        print(f"Errore: Il file {excel_file} non esiste!")
+    # Niente di cambiato dall'ultima build: si esce senza caricare il generatore né leggere il file Excel
+    profiling = args.timings or args.profile
+    if args.command is None and not args.watch and not profiling and inputs_unchanged(args.output, args.excel, args.logo, build_options):
+        print(f"Nessuna modifica a {args.excel} e al logo dall'ultima build: {args.output} è già aggiornato")
         return
     
-    print(f"Leggendo il file: {excel_file}")
-    sheets_data = read_all_excel_sheets(excel_file)
-    
-    if sheets_data:
-        output_file = "menu_completo_the_craft.html"
-        generate_complete_html_menu(sheets_data, output_file)
-        print(f"\n✅ Menu HTML completo generato con successo!")
-        print(f"📱 File creato: {output_file}")
-        print(f"🌐 Apri il file nel browser per visualizzare il menu completo ottimizzato per smartphone")
-        print(f"📊 Fogli processati: {len(sheets_data)}")
-    else:
-        print("❌ Errore nella lettura del file Excel")
+    return generator.run(args, output_options, build_options)
+
+def __getattr__(name):
+    """
+    Le funzioni del generatore restano importabili anche da qui (es. from menu_generator_complete import build_menu)
+    """
+    return getattr(generator, name)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
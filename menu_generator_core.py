@@ -0,0 +1,3223 @@
+# -*- coding: utf-8 -*-
+"""
+Menu Generator Core - Converte tutti i fogli Excel in HTML responsive per smartphone.
+Il programma si avvia con menu_generator_complete.py, che carica questo modulo solo quando serve una build
+"""
+
+import os
+import base64
+import hashlib
+import importlib.util
+import json
+import contextlib
+import cProfile
+import functools
+import glob
+import io
+import mimetypes
+import gzip
+import re
+import shutil
+import string
+import sys
+import tempfile
+import textwrap
+import time
+import unicodedata
+from datetime import datetime
+
+from menu_build_cache import (SNAPSHOT_DIR, _file_signature, _lazy_import, _renderer_fingerprint, build_cache_path,
+                              load_build_cache, record_build_inputs, save_build_cache, write_file_atomic)
+
+pd = _lazy_import('pandas')
+np = _lazy_import('numpy')
+openpyxl = _lazy_import('openpyxl')
+asyncio = _lazy_import('asyncio')
+logging = _lazy_import('logging')
+concurrent_futures = _lazy_import('concurrent.futures')
+
+# Pillow è opzionale: serve solo per ridimensionare il logo
+Image = _lazy_import('PIL.Image')
+
+try:
+    import brotli
+except ImportError:  # brotli è opzionale: serve solo per i file .html.br
+    brotli = None
+
+# pyarrow è opzionale: serve solo per gli snapshot dei dati
+pa = _lazy_import('pyarrow')
+
+# Livello dei messaggi: 1 normale, 2 anche colonne e prime righe di ogni foglio, 3 anche i tempi di ogni fase
+VERBOSITY = 1
+
+# Ogni fase misurata (span) viene passata anche al logger "menu_generator", a livello DEBUG
+LOGGER_NAME = "menu_generator"
+
+# Fasi misurate dall'ultimo start_spans(), oppure None se la raccolta non è attiva
+_SPANS = None
+
+def set_verbosity(level):
+    """
+    Imposta il livello dei messaggi; da 3 in su le fasi misurate vengono scritte anche sul terminale
+    """
+    global VERBOSITY
+    VERBOSITY = level
+    if level >= 3:
+        logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+
+def start_spans():
+    """
+    Inizia a raccogliere le fasi misurate (apertura del workbook, lettura e render dei fogli, ...)
+    """
+    global _SPANS
+    _SPANS = []
+
+def stop_spans():
+    """
+    Smette di raccogliere le fasi misurate e restituisce quelle raccolte
+    """
+    global _SPANS
+    spans, _SPANS = _SPANS or [], None
+    return spans
+
+@contextlib.contextmanager
+def span(stage, sheet=None, rows=None):
+    """
+    Misura una fase della pipeline. Il dizionario restituito può essere completato
+    con righe (rows) e byte prodotti (bytes) prima della fine del blocco
+    """
+    record = {'stage': stage, 'sheet': sheet, 'rows': rows, 'bytes': None, 'seconds': 0.0}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] += time.perf_counter() - start
+        _record_span(record)
+
+def _record_span(record):
+    """
+    Aggiunge una fase conclusa alla raccolta attiva e la passa al logger
+    """
+    if _SPANS is not None:
+        _SPANS.append(record)
+    logging.getLogger(LOGGER_NAME).debug("%-18s %-20s %9.2f ms  righe=%s  byte=%s", record['stage'], record['sheet'] or "",
+                 record['seconds'] * 1000, record['rows'], record['bytes'])
+
+def timed_chunks(chunks, record):
+    """
+    Passa i frammenti della pagina aggiungendo a record['seconds'] solo il tempo speso a produrli
+    (non quello di chi li scrive)
+    """
+    iterator = iter(chunks)
+    while True:
+        start = time.perf_counter()
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            record['seconds'] += time.perf_counter() - start
+        yield chunk
+
+def timings_report(spans):
+    """
+    Resoconto delle fasi misurate: elenco completo e totali per fase
+    """
+    stages = {}
+    for record in spans:
+        total = stages.setdefault(record['stage'], {'count': 0, 'seconds': 0.0, 'rows': 0, 'bytes': 0})
+        total['count'] += 1
+        total['seconds'] += record['seconds']
+        total['rows'] += record['rows'] or 0
+        total['bytes'] += record['bytes'] or 0
+    return {'stages': stages, 'spans': spans}
+
+def write_timings_report(report_file, spans):
+    """
+    Scrive il resoconto delle fasi in JSON e ne stampa un riepilogo
+    """
+    report = timings_report(spans)
+    write_file_atomic(report_file, json.dumps(report, ensure_ascii=False, indent=2))
+    if VERBOSITY >= 1:
+        print(f"\n⏱️  Tempi per fase (dettagli in {report_file}):")
+        for stage, total in report['stages'].items():
+            print(f"   {stage:<18}{total['seconds'] * 1000:>10.1f} ms  x{total['count']:<4} righe {total['rows']:<8} byte {total['bytes']}")
+    return report
+
+# Logo già letto (ed eventualmente ottimizzato), per percorso, firma del file e larghezza massima
+_LOGO_CACHE = {}
+
+def optimize_logo(data, max_width):
+    """
+    Ridimensiona il logo alla larghezza massima di visualizzazione e lo ricomprime in PNG.
+    Restituisce i dati originali se Pillow non è installato o se il risultato non è più leggero
+    (il secondo valore è il nuovo tipo MIME, None se il logo non è cambiato)
+    """
+    if Image is None:
+        print("Pillow non installato: il logo viene usato senza ottimizzazione (pip install Pillow)")
+        return data, None
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        resized = image.width > max_width
+        if resized:
+            height = max(1, round(image.height * max_width / image.width))
+            image = image.resize((max_width, height), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format='PNG', optimize=True)
+    optimized = output.getvalue()
+    if len(optimized) >= len(data):
+        return data, None
+    return optimized, 'image/png'
+
+def load_logo(logo_path="The_Craft_logo.png", max_width=None):
+    """
+    Legge il logo e restituisce (dati, tipo MIME, hash sha256) oppure None se manca.
+    Il risultato resta in cache finché data di modifica e dimensione del file non cambiano
+    """
+    try:
+        stat = os.stat(logo_path)
+    except OSError:
+        print(f"Logo non trovato: {logo_path}")
+        return None
+    key = (os.path.abspath(logo_path), stat.st_mtime_ns, stat.st_size, max_width)
+    if key in _LOGO_CACHE:
+        return _LOGO_CACHE[key]
+    
+    with open(logo_path, 'rb') as f:
+        data = f.read()
+    mime = mimetypes.guess_type(logo_path)[0] or 'image/png'
+    if max_width:
+        data, optimized_mime = optimize_logo(data, max_width)
+        mime = optimized_mime or mime
+    
+    logo = (data, mime, hashlib.sha256(data).hexdigest())
+    _LOGO_CACHE[key] = logo
+    return logo
+
+def get_logo_base64(logo_path="The_Craft_logo.png", max_width=None):
+    """
+    Converte il logo in BASE64 per l'inserimento nell'HTML
+    """
+    try:
+        with span('logo_encode') as record:
+            logo = load_logo(logo_path, max_width)
+            if logo is None:
+                return ""
+            data, mime, _ = logo
+            logo_data = base64.b64encode(data).decode('utf-8')
+            record['bytes'] = len(logo_data)
+            return f"data:{mime};base64,{logo_data}"
+    except Exception as e:
+        print(f"Errore nella conversione del logo: {e}")
+        return ""
+
+def write_logo_asset(logo_path, output_dir, max_width=None):
+    """
+    Scrive il logo come file separato nella cartella output_dir, con l'hash del contenuto
+    nel nome (es. The_Craft_logo.3f2a9c1b7d.png): i browser possono tenerlo in cache a lungo
+    perché ogni nuova versione del logo ha un nome diverso.
+    Restituisce il nome del file, da usare come src dell'immagine, oppure "" se il logo manca
+    """
+    try:
+        with span('logo_encode') as record:
+            logo = load_logo(logo_path, max_width)
+            if logo is None:
+                return ""
+            data, mime, digest = logo
+            record['bytes'] = len(data)
+            stem = os.path.splitext(os.path.basename(logo_path))[0]
+            extension = mimetypes.guess_extension(mime) or os.path.splitext(logo_path)[1]
+            asset_name = f"{stem}.{digest[:10]}{extension}"
+            asset_path = os.path.join(output_dir, asset_name)
+            if not os.path.exists(asset_path):
+                write_file_atomic(asset_path, data)
+            return asset_name
+    except Exception as e:
+        print(f"Errore nella scrittura del logo: {e}")
+        return ""
+
+def prepare_logo(logo_path, output_file, external=False, max_width=None):
+    """
+    Prepara il src del logo per la pagina in output_file: data URI inserito nell'HTML
+    oppure, con external=True, nome del file esterno scritto accanto all'HTML
+    """
+    if external:
+        return write_logo_asset(logo_path, os.path.dirname(os.path.abspath(output_file)), max_width)
+    return get_logo_base64(logo_path, max_width)
+
+def report_page_weight(output_file, logo_src):
+    """
+    Stampa il peso della pagina generata: HTML più l'eventuale logo esterno
+    """
+    html_bytes = os.path.getsize(output_file)
+    logo_bytes = 0
+    if logo_src and not logo_src.startswith('data:'):
+        asset_path = os.path.join(os.path.dirname(os.path.abspath(output_file)), logo_src)
+        if os.path.exists(asset_path):
+            logo_bytes = os.path.getsize(asset_path)
+    message = f"⚖️  Peso della pagina: HTML {html_bytes / 1024:.1f} KB"
+    if logo_bytes:
+        message += f" + logo {logo_bytes / 1024:.1f} KB (in cache nel browser) = {(html_bytes + logo_bytes) / 1024:.1f} KB"
+    print(message)
+    return html_bytes + logo_bytes
+
+# Stringhe che pandas considera valori mancanti quando legge un foglio Excel
+NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+    'nan', 'null',
+}
+
+def identify_columns(columns):
+    """
+    Assegna i ruoli (nome, prezzo, descrizione, produttore, tipo, caratteristica)
+    alle colonne di un foglio in base alle intestazioni
+    """
+    name_column = None
+    price_column = None
+    description_column = None
+    brewery_column = None
+    tipo_column = None
+    caratteristica_column = None
+    
+    for col in columns:
+        if col == 'Menu':  # Salta la colonna Menu
+            continue
+        col_lower = str(col).lower()
+        # Controlla prima le colonne specifiche per evitare conflitti
+        if any(word in col_lower for word in ['gineria', 'sidreria', 'birrificio', 'brewery', 'produttore', 'producer']):
+            brewery_column = col
+        elif any(word in col_lower for word in ['tipo']):
+            tipo_column = col
+        elif any(word in col_lower for word in ['caratteristica']):
+            caratteristica_column = col
+        elif any(word in col_lower for word in ['nome', 'name', 'piatto', 'dish', 'prodotto', 'product', 'birra', 'bevanda', 'sidro', 'gin']):
+            name_column = col
+        elif any(word in col_lower for word in ['prezzo', 'price', 'costo', 'cost', '€', 'euro']) or isinstance(col, (int, float)):
+            price_column = col
+        elif any(word in col_lower for word in ['descrizione', 'description', 'dettagli', 'details', 'stile']):
+            description_column = col
+    
+    # Se non troviamo colonne specifiche, usa le prime colonne disponibili
+    available_cols = [col for col in columns if col != 'Menu']
+    
+    if not name_column and len(available_cols) > 0:
+        name_column = available_cols[0]
+    if not price_column and len(available_cols) > 1:
+        price_column = available_cols[1]
+    if not description_column and len(available_cols) > 2:
+        # Evita di usare la stessa colonna del nome come descrizione
+        for col in available_cols[2:]:
+            if col != name_column and col != price_column and col != brewery_column:
+                description_column = col
+                break
+    if not brewery_column and len(available_cols) > 3:
+        # Evita di usare colonne già assegnate
+        for col in available_cols[3:]:
+            if col != name_column and col != price_column and col != description_column:
+                brewery_column = col
+                break
+    
+    return {
+        'name': name_column,
+        'price': price_column,
+        'description': description_column,
+        'brewery': brewery_column,
+        'tipo': tipo_column,
+        'caratteristica': caratteristica_column,
+    }
+
+def get_price_columns(columns):
+    """
+    Restituisce le colonne numeriche usate come prezzi per diverse misure (es. 0.4, 0.3, 0.2)
+    """
+    return [col for col in columns if isinstance(col, (int, float)) and pd.notna(col) and col != 'Menu']
+
+# Ruoli che si possono assegnare alle colonne di un foglio
+COLUMN_ROLES = ('name', 'price', 'description', 'brewery', 'tipo', 'caratteristica')
+
+# Assegnazioni manuali dei ruoli per foglio, impostate con override_column_roles()
+COLUMN_OVERRIDES = {}
+
+@functools.lru_cache(maxsize=None)
+def _resolve_schema(key):
+    """
+    Riconoscimento delle colonne memorizzato per intestazione (vedi resolve_schema)
+    """
+    columns = [col for _, col in key]
+    return _schema(identify_columns(columns), get_price_columns(columns))
+
+def _schema(roles, price_columns):
+    """
+    Schema di un foglio: ruoli delle colonne e misure, anche già ordinate
+    """
+    return {
+        'roles': dict(roles),
+        'price_columns': list(price_columns),
+        'sizes_ascending': sorted(price_columns),
+        'sizes_descending': sorted(price_columns, reverse=True),
+    }
+
+def resolve_schema(columns):
+    """
+    Restituisce lo schema (ruoli delle colonne e misure ordinate) di un'intestazione.
+    Il riconoscimento viene fatto una sola volta per ogni combinazione di intestazioni
+    e riutilizzato da tutti i fogli, le build e i locali con lo stesso layout
+    """
+    # Il tipo fa parte della chiave: 1 e 1.0 sono colonne diverse (es. "1L" e "1.0L")
+    schema = _resolve_schema(tuple((type(col), col) for col in columns))
+    # Copia, così chi modifica lo schema restituito non altera quello memorizzato
+    return {key: (dict(value) if isinstance(value, dict) else list(value)) for key, value in schema.items()}
+
+def override_column_roles(sheet_name, **roles):
+    """
+    Assegna a mano il ruolo di alcune colonne di un foglio, es.
+    override_column_roles("Whisky", description="Note", price_columns=[0.04, 0.02])
+    """
+    unknown = set(roles) - set(COLUMN_ROLES) - {'price_columns'}
+    if unknown:
+        raise ValueError(f"Ruoli sconosciuti: {sorted(unknown)}")
+    COLUMN_OVERRIDES.setdefault(sheet_name, {}).update(roles)
+
+def clear_column_overrides(sheet_name=None):
+    """
+    Rimuove le assegnazioni manuali di un foglio, o di tutti i fogli
+    """
+    if sheet_name is None:
+        COLUMN_OVERRIDES.clear()
+    else:
+        COLUMN_OVERRIDES.pop(sheet_name, None)
+
+def get_sheet_schema(sheet_name, columns):
+    """
+    Schema di un foglio: quello riconosciuto dalle intestazioni con le eventuali
+    assegnazioni manuali del foglio applicate sopra
+    """
+    overrides = COLUMN_OVERRIDES.get(sheet_name)
+    if not overrides:
+        return resolve_schema(columns)
+    
+    # Un nome di colonna sbagliato va segnalato subito, non come KeyError durante il rendering
+    columns = list(columns)
+    for role, value in overrides.items():
+        for col in (value if role == 'price_columns' else [value]):
+            if col is not None and col not in columns:
+                raise ValueError(f"Foglio '{sheet_name}': la colonna {col!r} indicata per il ruolo '{role}' non esiste")
+    
+    schema = resolve_schema(columns)
+    roles = schema['roles']
+    roles.update((role, col) for role, col in overrides.items() if role != 'price_columns')
+    return _schema(roles, overrides.get('price_columns', schema['price_columns']))
+
+def _needed_columns(sheet_name, columns):
+    """
+    Restituisce le colonne che servono al menu (Menu, colonne con un ruolo e prezzi per misura).
+    Se togliendo le altre colonne il riconoscimento dei ruoli cambierebbe, le tiene tutte.
+    """
+    schema = get_sheet_schema(sheet_name, columns)
+    used = set(col for col in schema['roles'].values() if col is not None) | set(schema['price_columns'])
+    needed = [col for col in columns if col == 'Menu' or col in used]
+    if get_sheet_schema(sheet_name, needed) != schema:
+        return list(columns)
+    return needed
+
+def _convert_cell(value):
+    """
+    Converte il valore di una cella come fa pandas.read_excel
+    """
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value in NA_STRINGS:
+        return None
+    return value
+
+@functools.lru_cache(maxsize=None)
+def _numeric_text(value):
+    """
+    Numero scritto in una cella di testo (es. "1", " 4.5 ", "1e3"), letto come fa pandas.read_excel;
+    None se il testo non è un numero
+    """
+    value = value.strip()
+    if not value.isascii() or '_' in value:
+        return None
+    if value.lstrip('+-').isdigit():
+        number = int(value)
+        return number if -2**63 <= number < 2**63 else float(number)
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def _normalize_header(header):
+    """
+    Normalizza la riga di intestazione come pandas: celle vuote diventano
+    'Unnamed: N' e i nomi duplicati ricevono un suffisso numerico
+    """
+    header = list(header)
+    while header and header[-1] is None:
+        header.pop()
+    columns = []
+    seen = {}
+    for i, value in enumerate(header):
+        col = f"Unnamed: {i}" if value is None else _convert_cell(value)
+        if col in seen:
+            seen[col] += 1
+            col = f"{col}.{seen[col]}"
+        else:
+            seen[col] = 0
+        columns.append(col)
+    return columns
+
+def _column_dtype(has_null, has_int, has_float, has_text, has_text_int=False, has_text_float=False, has_bool=False):
+    """
+    Sceglie il dtype della colonna filtrata in base ai valori visti su tutto il foglio,
+    così il risultato coincide con quello di pandas.read_excel. Se la colonna non ha testo
+    che non sia un numero, pandas la converte in numeri: "1" diventa 1 e TRUE diventa 1
+    (tranne in una colonna di soli TRUE/FALSE, che resta booleana)
+    """
+    if has_text:
+        return object if (has_int or has_float or has_bool) else None
+    if has_bool and not (has_int or has_float or has_text_int or has_text_float or has_null):
+        return None
+    has_int = has_int or has_text_int or has_bool
+    has_float = has_float or has_text_float
+    if has_float or (has_int and has_null):
+        return 'float64'
+    if has_int:
+        return 'int64'
+    if has_null:
+        return 'float64'
+    return None
+
+# Colonne di testo con al più questa quota di valori distinti (produttore, tipo, stile...)
+# diventano categoriche: ogni valore ripetuto occupa un codice invece di una stringa
+CATEGORY_MAX_RATIO = 0.5
+
+# I decimali multipli di 0.25 sotto questo limite sono esatti in float32 e si scrivono
+# allo stesso modo che in float64 (es. 4.5 -> "4.5"); gli altri prezzi restano float64
+FLOAT32_EXACT_LIMIT = 65536
+
+def _compact_column(series):
+    """
+    Versione compatta di una colonna con gli stessi valori: testo ripetuto -> category,
+    prezzi esatti in float32 (es. 4.5, 12.25) -> float32. Le altre colonne restano invariate
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    values = series.dropna()
+    if values.empty:
+        return series
+    if series.dtype == 'float64':
+        quarters = values.to_numpy() * 4
+        if (np.abs(values.to_numpy()) < FLOAT32_EXACT_LIMIT).all() and (quarters == np.floor(quarters)).all():
+            return series.astype('float32')
+        return series
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        if values.map(type).eq(str).all() and values.nunique() <= len(values) * CATEGORY_MAX_RATIO:
+            return series.astype('category')
+    return series
+
+def compact_dtypes(df):
+    """
+    Riduce la memoria di un foglio filtrato senza cambiare i valori (né l'HTML generato):
+    testo ripetuto come categorie, prezzi esatti in float32
+    """
+    df = df.copy(deep=False)
+    for position in range(df.shape[1]):
+        df.isetitem(position, _compact_column(df.iloc[:, position]))
+    return df
+
+def _read_sheet_streaming(worksheet):
+    """
+    Legge un foglio in modalità read-only scorrendo le righe una sola volta:
+    carica solo le colonne necessarie e applica il filtro Menu = 1 durante la lettura.
+    Restituisce (colonne del foglio, DataFrame filtrato, righe totali)
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return [], None, 0
+    
+    columns = _normalize_header(header)
+    with span('column_detection', worksheet.title):
+        needed = _needed_columns(worksheet.title, columns)
+    indices = [columns.index(col) for col in needed]
+    menu_index = columns.index('Menu') if 'Menu' in columns else None
+    
+    # Per ogni colonna caricata: valori nulli, interi, decimali, testo non numerico,
+    # testo intero (es. "1"), testo decimale (es. "4.5"), booleani
+    flags = [[False, False, False, False, False, False, False] for _ in indices]
+    # Valori delle righe tenute, colonna per colonna; ogni testo ripetuto è un solo oggetto
+    kept_columns = [[] for _ in indices]
+    seen_text = [{} for _ in indices]
+    kept_index = []
+    # Posizioni (in kept_index) delle righe tenute per un Menu scritto come testo
+    text_menu_rows = []
+    total_rows = 0
+    blank_rows = 0
+    
+    for raw in rows:
+        if all(value is None for value in raw):
+            blank_rows += 1
+            continue
+        if blank_rows:
+            # pandas tiene le righe vuote in mezzo al foglio (tutte NaN) e scarta solo quelle in fondo
+            for flag in flags:
+                flag[0] = True
+            if menu_index is None:
+                for kept in kept_columns:
+                    kept.extend([None] * blank_rows)
+                kept_index.extend(range(total_rows, total_rows + blank_rows))
+            total_rows += blank_rows
+            blank_rows = 0
+        values = [_convert_cell(raw[i]) if i < len(raw) else None for i in indices]
+        for value, flag in zip(values, flags):
+            if value is None:
+                flag[0] = True
+            elif isinstance(value, bool):
+                flag[6] = True
+            elif isinstance(value, int):
+                flag[1] = True
+            elif isinstance(value, float):
+                flag[2] = True
+            elif flag[3]:
+                pass  # la colonna ha già testo non numerico: resta testo
+            else:
+                number = _numeric_text(value)
+                if number is None:
+                    flag[3] = True
+                else:
+                    flag[4 if number.__class__ is int else 5] = True
+        if menu_index is not None:
+            menu = _convert_cell(raw[menu_index] if menu_index < len(raw) else None)
+            if menu.__class__ is str:
+                menu = _numeric_text(menu)
+                if menu == 1:
+                    text_menu_rows.append(len(kept_index))
+        if menu_index is None or menu == 1:
+            for value, kept, seen in zip(values, kept_columns, seen_text):
+                if value.__class__ is str:
+                    value = seen.setdefault(value, value)
+                kept.append(value)
+            kept_index.append(total_rows)
+        total_rows += 1
+    
+    if total_rows == 0:
+        return columns, None, 0
+    
+    # Un "1" scritto come testo vale 1 solo se pandas converte tutta la colonna Menu in numeri
+    if text_menu_rows and flags[needed.index('Menu')][3]:
+        dropped = set(text_menu_rows)
+        kept_rows = [k for k in range(len(kept_index)) if k not in dropped]
+        kept_index = [kept_index[k] for k in kept_rows]
+        kept_columns = [[kept[k] for k in kept_rows] for kept in kept_columns]
+    
+    data = {}
+    for j, col in enumerate(needed):
+        values = kept_columns[j]
+        kept_columns[j] = None  # la lista non serve più una volta creata la colonna
+        dtype = _column_dtype(*flags[j])
+        if (flags[j][4] or flags[j][5]) and not flags[j][3]:
+            values = [_numeric_text(value) if value.__class__ is str else value for value in values]
+        if dtype is object or flags[j][3]:
+            # Le celle vuote delle colonne di testo sono NaN, come in pandas
+            values = [float('nan') if value is None else value for value in values]
+        data[col] = _compact_column(pd.Series(values, index=kept_index, dtype=dtype))
+    return columns, pd.DataFrame(data, index=kept_index), total_rows
+
+def _print_sheet_details(sheet_name, columns, total_rows, df, filtered):
+    """
+    Stampa colonne, numero di righe e prime righe di un foglio (livello di dettaglio 2)
+    """
+    print(f"\nFoglio '{sheet_name}':")
+    print(f"Colonne: {columns}")
+    if not filtered:
+        print(f"Righe: {total_rows}")
+        print(f"Prime righe:\n{df.head()}")
+    elif df.empty:
+        print(f"Righe totali: {total_rows}, Righe con Menu=1: 0")
+        print(f"Nessuna riga con Menu=1 trovata per '{sheet_name}'")
+    else:
+        print(f"Righe totali: {total_rows}, Righe con Menu=1: {len(df)}")
+        print(f"Prime righe filtrate:\n{df.head()}")
+
+def _read_xlsx_streaming(file_path):
+    """
+    Apre il file .xlsx una sola volta con openpyxl (read-only, solo valori)
+    e legge tutti i fogli dallo stesso workbook
+    """
+    with span('workbook_open') as record:
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        record['bytes'] = os.path.getsize(file_path)
+    try:
+        if VERBOSITY >= 1:
+            print(f"Fogli trovati: {workbook.sheetnames}")
+        
+        sheets_data = {}
+        for worksheet in workbook.worksheets:
+            sheet_name = worksheet.title
+            # Il filtro Menu = 1 viene applicato durante la lettura delle righe
+            with span('sheet_parse', sheet_name) as record:
+                columns, df, total_rows = _read_sheet_streaming(worksheet)
+                record['rows'] = total_rows
+            if df is None:
+                continue
+            if 'Menu' in columns:
+                if not df.empty:
+                    sheets_data[sheet_name] = df
+            else:
+                sheets_data[sheet_name] = df
+            if VERBOSITY >= 2:
+                _print_sheet_details(sheet_name, columns, total_rows, df, 'Menu' in columns)
+        
+        return sheets_data
+    finally:
+        workbook.close()
+
+def _read_with_pandas(file_path):
+    """
+    Lettura con pandas per i formati non supportati da openpyxl (es. .xls)
+    """
+    with span('workbook_open') as record:
+        excel_file = pd.ExcelFile(file_path)
+        record['bytes'] = os.path.getsize(file_path)
+    with excel_file:
+        sheet_names = excel_file.sheet_names
+        
+        if VERBOSITY >= 1:
+            print(f"Fogli trovati: {sheet_names}")
+        
+        sheets_data = {}
+        for sheet_name in sheet_names:
+            with span('sheet_parse', sheet_name) as record:
+                df = excel_file.parse(sheet_name)
+                record['rows'] = len(df)
+            if not df.empty:
+                # Filtra solo le righe con Menu = 1
+                if 'Menu' in df.columns:
+                    with span('filter', sheet_name) as record:
+                        df_filtered = df[df['Menu'] == 1]
+                        record['rows'] = len(df_filtered)
+                    if not df_filtered.empty:
+                        sheets_data[sheet_name] = compact_dtypes(df_filtered)
+                else:
+                    df_filtered = df
+                    sheets_data[sheet_name] = compact_dtypes(df)
+                if VERBOSITY >= 2:
+                    _print_sheet_details(sheet_name, list(df.columns), len(df), df_filtered, 'Menu' in df.columns)
+        
+        return sheets_data
+
+def snapshot_key(file_path):
+    """
+    Chiave dello snapshot di un file Excel: hash del contenuto del file, del codice
+    del generatore e delle assegnazioni manuali delle colonne (che cambiano le colonne caricate)
+    """
+    snapshot_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            snapshot_hash.update(block)
+    snapshot_hash.update(_renderer_fingerprint().encode('utf-8'))
+    snapshot_hash.update(repr(sorted(COLUMN_OVERRIDES.items(), key=repr)).encode('utf-8'))
+    return snapshot_hash.hexdigest()
+
+def _snapshot_prefix(file_path):
+    """
+    Prefisso delle cartelle di snapshot di un file Excel (nome e hash del percorso)
+    """
+    path_hash = hashlib.sha256(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:8]
+    stem = re.sub(r'[^A-Za-z0-9_.-]+', '_', os.path.splitext(os.path.basename(file_path))[0])
+    return f"{stem}-{path_hash}-"
+
+def _encode_label(col):
+    """
+    Intestazione di colonna in forma JSON, con il tipo (es. 0.4 resta un float)
+    """
+    if isinstance(col, (bool, np.bool_)):
+        return ['bool', bool(col)]
+    if isinstance(col, (int, np.integer)):
+        return ['int', int(col)]
+    if isinstance(col, (float, np.floating)):
+        return ['float', float(col)]
+    if isinstance(col, str):
+        return ['str', col]
+    raise TypeError(f"intestazione non supportata: {col!r}")
+
+def _decode_label(label):
+    """
+    Ricostruisce un'intestazione di colonna salvata con _encode_label
+    """
+    kind, value = label
+    return {'bool': bool, 'int': int, 'float': float, 'str': str}[kind](value)
+
+def _json_cell(value):
+    """
+    Valore di una colonna mista in JSON (i valori mancanti diventano null)
+    """
+    if pd.isna(value):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if not isinstance(value, (bool, int, float, str)):
+        raise TypeError(f"valore non supportato: {value!r}")
+    return json.dumps(value)
+
+def _encode_column(series):
+    """
+    Converte una colonna in un array Arrow. Le colonne con valori di tipo diverso
+    (es. 6 e "7-9") vengono salvate come JSON per non perdere il tipo di ogni cella.
+    Restituisce (array, codifica)
+    """
+    if series.dtype == object and not series.dropna().map(type).eq(str).all():
+        return pa.array([_json_cell(value) for value in series], type=pa.string()), 'json'
+    return pa.array(series, from_pandas=True), 'arrow'
+
+def write_snapshot(file_path, sheets_data, snapshot_dir=SNAPSHOT_DIR, key=None):
+    """
+    Salva i fogli filtrati in formato colonnare (Arrow IPC / Feather v2, un file per foglio)
+    in una cartella legata all'hash del file Excel e rimuove gli snapshot precedenti dello stesso file
+    """
+    key = key or snapshot_key(file_path)
+    prefix = _snapshot_prefix(file_path)
+    target = os.path.join(snapshot_dir, prefix + key[:16])
+    if os.path.isdir(target):
+        return target
+    
+    os.makedirs(snapshot_dir, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir=snapshot_dir, prefix=".tmp-")
+    try:
+        manifest = {'workbook': os.path.abspath(file_path), 'key': key, 'sheets': []}
+        for position, (sheet_name, df) in enumerate(sheets_data.items()):
+            arrays = [pa.array(df.index.to_numpy())]
+            names = ['__index__']
+            columns = []
+            for column_position, col in enumerate(df.columns):
+                array, encoding = _encode_column(df[col])
+                arrays.append(array)
+                names.append(f"c{column_position}")
+                columns.append({'label': _encode_label(col), 'dtype': str(df[col].dtype), 'encoding': encoding})
+            file_name = f"{position}.arrow"
+            with pa.OSFile(os.path.join(temp_dir, file_name), 'wb') as sink:
+                table = pa.Table.from_arrays(arrays, names=names)
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            manifest['sheets'].append({'name': sheet_name, 'file': file_name, 'columns': columns})
+        with open(os.path.join(temp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.rename(temp_dir, target)
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        if os.path.isdir(target):
+            return target  # scritto nel frattempo da un altro processo
+        raise
+    
+    # Gli snapshot delle versioni precedenti dello stesso file non servono più
+    for name in os.listdir(snapshot_dir):
+        if name.startswith(prefix) and name != os.path.basename(target):
+            shutil.rmtree(os.path.join(snapshot_dir, name), ignore_errors=True)
+    return target
+
+def read_snapshot(file_path, snapshot_dir=SNAPSHOT_DIR, key=None):
+    """
+    Legge i fogli filtrati dallo snapshot del file Excel (file mappati in memoria),
+    None se lo snapshot per questa versione del file non esiste
+    """
+    key = key or snapshot_key(file_path)
+    target = os.path.join(snapshot_dir, _snapshot_prefix(file_path) + key[:16])
+    try:
+        with open(os.path.join(target, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('key') != key:
+        return None
+    
+    sheets_data = {}
+    for sheet in manifest['sheets']:
+        with pa.memory_map(os.path.join(target, sheet['file']), 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        data = {}
+        for position, column in enumerate(sheet['columns']):
+            array = table.column(f"c{position}")
+            if column['encoding'] == 'json':
+                values = [np.nan if value is None else json.loads(value) for value in array.to_pylist()]
+                values = pd.Series(values, dtype=object)
+            else:
+                values = array.to_pandas()
+                if str(values.dtype) != column['dtype']:
+                    values = values.astype(column['dtype'])
+                    if column['dtype'] == 'object':
+                        values = values.where(values.notna(), np.nan)
+            data[_decode_label(column['label'])] = values.array
+        index = table.column('__index__').to_numpy()
+        sheets_data[sheet['name']] = pd.DataFrame(data, index=index)
+    return sheets_data
+
+def clear_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """
+    Cancella tutti gli snapshot; restituisce il numero di snapshot rimossi
+    """
+    if not os.path.isdir(snapshot_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(snapshot_dir):
+        path = os.path.join(snapshot_dir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+def read_all_excel_sheets(file_path, snapshot_dir=None):
+    """
+    Legge tutti i fogli del file Excel e restituisce un dizionario con i dati.
+    Con snapshot_dir i fogli filtrati vengono salvati in formato colonnare (richiede pyarrow)
+    e, finché il file Excel non cambia, riletti da lì senza analizzare di nuovo il file
+    """
+    try:
+        key = None
+        if snapshot_dir and pa is not None:
+            key = snapshot_key(file_path)
+            with span('snapshot_read') as record:
+                sheets_data = read_snapshot(file_path, snapshot_dir, key)
+                record['rows'] = sum(len(df) for df in sheets_data.values()) if sheets_data else 0
+            if sheets_data is not None:
+                print(f"Dati letti dallo snapshot in {snapshot_dir} ({len(sheets_data)} fogli)")
+                return sheets_data
+        
+        if os.path.splitext(file_path)[1].lower() in ('.xlsx', '.xlsm'):
+            sheets_data = _read_xlsx_streaming(file_path)
+        else:
+            sheets_data = _read_with_pandas(file_path)
+        
+        if key is not None and sheets_data is not None:
+            try:
+                write_snapshot(file_path, sheets_data, snapshot_dir, key)
+            except Exception as e:
+                # Senza snapshot il menu si genera comunque, solo più lentamente la prossima volta
+                print(f"Snapshot non salvato: {e}")
+        return sheets_data
+        
+    except Exception as e:
+        print(f"Errore nella lettura del file Excel: {e}")
+        return None
+
+def hash_sheet(sheet_name, df):
+    """
+    Calcola l'hash del contenuto di un foglio (nome, colonne, schema, tipi e valori)
+    """
+    sheet_hash = hashlib.sha256()
+    schema = get_sheet_schema(sheet_name, df.columns)
+    sheet_hash.update(repr((sheet_name, [repr(col) for col in df.columns], repr(schema), [str(dtype) for dtype in df.dtypes])).encode('utf-8'))
+    sheet_hash.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return sheet_hash.hexdigest()
+
+# Template HTML con CSS responsive, diviso nei punti in cui vengono inseriti logo, navigazione e sezioni
+PAGE_HEAD = """<!DOCTYPE html>
+<html lang="it">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Menu Completo The Craft</title>
+    <style>
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+        
+        body {
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            min-height: 100vh;
+            padding: 10px;
+        }
+        
+        .container {
+            max-width: 100%;
+            margin: 0 auto;
+            background: white;
+            border-radius: 15px;
+            box-shadow: 0 10px 30px rgba(0,0,0,0.3);
+            overflow: hidden;
+        }
+        
+        .header {
+            background: linear-gradient(45deg, #f39c12, #e67e22);
+            color: white;
+            text-align: center;
+            padding: 20px;
+        }
+        
+        .header h1 {
+            font-size: 2em;
+            margin-bottom: 10px;
+            text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
+        }
+        
+        .header p {
+            font-size: 1em;
+            opacity: 0.9;
+        }
+        
+        .logo {
+            width: 100%;
+            height: auto;
+            margin: 0 auto 20px auto;
+            display: block;
+            border-radius: 15px;
+            background: white;
+            padding: 20px;
+            box-shadow: 0 6px 12px rgba(0,0,0,0.3);
+            border: 3px solid #2c3e50;
+            max-width: 100%;
+        }
+        
+        .menu-section {
+            padding: 20px;
+            border-bottom: 1px solid #eee;
+        }
+        
+        .menu-section:last-child {
+            border-bottom: none;
+        }
+        
+        .section-title {
+            font-size: 1.4em;
+            color: #2c3e50;
+            margin-bottom: 15px;
+            text-align: center;
+            border-bottom: 3px solid #f39c12;
+            padding-bottom: 10px;
+            background: linear-gradient(45deg, #f39c12, #e67e22);
+            color: white;
+            padding: 12px;
+            border-radius: 10px;
+            margin: 15px 0;
+            position: relative;
+        }
+        
+        .back-to-top {
+            position: absolute;
+            right: 15px;
+            top: 50%;
+            transform: translateY(-50%);
+            color: white;
+            text-decoration: none;
+            font-size: 1.2em;
+            background: rgba(255,255,255,0.2);
+            padding: 8px;
+            border-radius: 50%;
+            transition: all 0.3s ease;
+            width: 32px;
+            height: 32px;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+        }
+        
+        .back-to-top:hover {
+            background: rgba(255,255,255,0.3);
+            transform: translateY(-50%) scale(1.1);
+        }
+        
+        .menu-item {
+            display: flex;
+            flex-direction: column;
+            align-items: flex-start;
+            padding: 12px;
+            margin: 8px 0;
+            background: #f8f9fa;
+            border-radius: 8px;
+            border-left: 3px solid #3498db;
+            transition: all 0.3s ease;
+        }
+        
+        .menu-item:hover {
+            transform: translateX(5px);
+            box-shadow: 0 5px 15px rgba(0,0,0,0.1);
+        }
+        
+        .item-header {
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            width: 100%;
+            margin-bottom: 4px;
+        }
+        
+        .item-name {
+            font-weight: bold;
+            font-size: 1em;
+            color: #2c3e50;
+            flex: 1;
+            word-wrap: break-word;
+            line-height: 1.3;
+        }
+        
+        .item-producer {
+            font-weight: bold;
+            font-size: 1em;
+            color: #2c3e50;
+        }
+        
+        .item-price {
+            font-size: 1.1em;
+            font-weight: bold;
+            color: #e74c3c;
+            margin-left: 15px;
+            white-space: nowrap;
+            flex-shrink: 0;
+        }
+        
+        .price-table {
+            display: table;
+            width: 100%;
+            margin-top: 10px;
+        }
+        
+        .price-header {
+            display: table-header-group;
+            background: #ecf0f1;
+            border-radius: 5px;
+        }
+        
+        .price-row {
+            display: table-row;
+        }
+        
+        .price-cell {
+            display: table-cell;
+            padding: 6px 10px;
+            text-align: center;
+            border-right: 1px solid #bdc3c7;
+            font-weight: bold;
+            color: #2c3e50;
+            font-size: 0.9em;
+        }
+        
+        .price-cell:last-child {
+            border-right: none;
+        }
+        
+        .price-value {
+            font-size: 1em;
+            font-weight: bold;
+            color: #e74c3c;
+        }
+        
+        .item-description {
+            font-size: 0.8em;
+            color: #7f8c8d;
+            margin-top: 4px;
+            font-style: italic;
+        }
+        
+        
+        .footer {
+            background: #2c3e50;
+            color: white;
+            text-align: center;
+            padding: 15px;
+            font-size: 0.8em;
+        }
+        
+        @media (max-width: 480px) {
+            .header h1 {
+                font-size: 1.6em;
+            }
+            
+            .logo {
+                width: 100%;
+                height: auto;
+                padding: 15px;
+            }
+            
+            .item-header {
+                flex-direction: column;
+                align-items: flex-start;
+            }
+            
+            .item-price {
+                margin-left: 0;
+                margin-top: 5px;
+                align-self: flex-end;
+            }
+        }
+        
+        .no-data {
+            text-align: center;
+            padding: 40px;
+            color: #7f8c8d;
+            font-style: italic;
+        }
+        
+        .navigation {
+            background: #34495e;
+            padding: 15px;
+            text-align: center;
+        }
+        
+        .nav-link {
+            color: white;
+            text-decoration: none;
+            margin: 5px 8px;
+            padding: 8px 12px;
+            border-radius: 8px;
+            background: #f39c12;
+            transition: all 0.3s ease;
+            display: inline-block;
+            font-size: 0.9em;
+            font-weight: 500;
+        }
+        
+        .nav-link:hover {
+            background: #e67e22;
+            transform: translateY(-2px);
+            box-shadow: 0 4px 8px rgba(0,0,0,0.2);
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header" id="top">
+            """
+
+PAGE_HEADER_TAIL = """
+            <h1>🍽️ Menu Completo The Craft</h1>
+            <p>Esperienza culinaria unica</p>
+        </div>
+        
+        <div class="navigation">
+            """
+
+PAGE_NAVIGATION_TAIL = """
+        </div>
+        
+        """
+
+PAGE_FOOTER = """
+        
+        <div class="footer">
+            <p>Generato il {date} | Menu The Craft</p>
+        </div>
+    </div>
+</body>
+</html>"""
+
+# Template parziali di sezioni e articoli. I campi vengono sostituiti da render_template,
+# con un valore solo o con una colonna intera; quelli che finiscono in _html sono già HTML
+# e non vengono sottoposti all'escape
+LOGO_TEMPLATE = '<img src="{src}" alt="The Craft Logo" class="logo">'
+STYLESHEET_LINK_TEMPLATE = '<link rel="stylesheet" href="{href}">'
+SHELL_CONTENT_TEMPLATE = '<div id="menu-content" data-src="{data_url}"><noscript><div class="no-data">Per vedere il menu attiva JavaScript</div></noscript></div>\n'
+NAV_LINK_TEMPLATE = '<a href="#{section_id}" class="nav-link">{sheet_name}</a>'
+SECTION_OPEN_TEMPLATE = '<div class="menu-section" id="{section_id}">\n<h2 class="section-title">{sheet_name} <a href="#top" class="back-to-top">↑</a></h2>\n'
+SECTION_CLOSE_TEMPLATE = '</div>\n'
+PRICE_TABLE_OPEN_TEMPLATE = '<div class="price-table">\n<div class="price-header">\n<div class="price-row">\n<div class="price-cell"></div>\n{sizes_html}</div>\n</div>\n'
+PRICE_TABLE_SIZE_TEMPLATE = '<div class="price-cell">{size}L</div>\n'
+PRICE_TABLE_CLOSE_TEMPLATE = '</div>\n'
+PRICE_ROW_TEMPLATE = '<div class="price-row">\n<div class="price-cell" style="text-align: left; font-weight: bold;">{name_html}</div>\n{prices_html}</div>\n{description_html}'
+PRICE_CELL_TEMPLATE = '<div class="price-cell"><span class="price-value">€{price_html}</span></div>\n'
+PRICE_CELL_EMPTY_TEMPLATE = '<div class="price-cell">-</div>\n'
+PRICE_ROW_DESCRIPTION_TEMPLATE = '<div class="item-description" style="padding: 4px 0; font-style: italic; color: #7f8c8d; font-size: 0.8em;">{description_html}</div>\n'
+ITEM_TEMPLATE = '<div class="menu-item">\n<div class="item-header">\n{name_html}<div class="item-price">{price_html}</div>\n</div>\n{description_html}</div>\n'
+ITEM_NAME_TEMPLATE = '<div class="item-name">{name_html}</div>\n'
+ITEM_NAME_PRODUCER_TEMPLATE = '<div class="item-name">{name_html} - <span class="item-producer">{producer_html}</span></div>\n'
+ITEM_DESCRIPTION_TEMPLATE = '<div class="item-description">{description_html}</div>\n'
+
+# Caratteri da sostituire nel testo inserito nell'HTML (gli attributi usano sempre le virgolette doppie)
+_HTML_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})
+
+def escape_html(values):
+    """
+    Escape HTML di un testo o di una colonna intera di testi. Per le colonne si controlla
+    prima tutto il testo in un colpo solo: se non ci sono caratteri speciali (il caso normale)
+    la colonna viene restituita così com'è, senza lavoro per ogni riga
+    """
+    if isinstance(values, str):
+        return values.translate(_HTML_ESCAPES)
+    joined = ''.join(values)
+    if not any(char in joined for char in '&<>"'):
+        return values
+    return np.array([value.translate(_HTML_ESCAPES) for value in values], dtype=object)
+
+@functools.lru_cache(maxsize=None)
+def compile_template(template):
+    """
+    Compila un template una sola volta: sequenza di (testo fisso, campo, escape sì/no)
+    """
+    parts = []
+    for literal, field, _, _ in string.Formatter().parse(template):
+        parts.append((literal, field, field is not None and not field.endswith('_html')))
+    return tuple(parts)
+
+def render_template(template, **fields):
+    """
+    Riempie un template compilato. Ogni campo può essere un testo o una colonna (array numpy):
+    con le colonne il risultato è una colonna con l'HTML di ogni riga
+    """
+    result = ""
+    for literal, field, escape in compile_template(template):
+        if literal:
+            result = result + literal
+        if field is not None:
+            value = fields[field]
+            result = result + (escape_html(value) if escape else value)
+    return result
+
+def logo_html(logo_src):
+    """
+    Logo dell'intestazione (data URI o URL del file esterno); nessun tag senza logo
+    """
+    return render_template(LOGO_TEMPLATE, src=logo_src) if logo_src else ""
+
+# Altezza stimata in pixel di un articolo: le sezioni non ancora costruite occupano già
+# circa lo spazio finale, così all'apertura solo le prime entrano nel margine dell'observer
+LAZY_ROW_HEIGHT = 64
+
+# Script delle sezioni caricate su richiesta: ogni sezione viene costruita quando
+# si avvicina allo schermo o quando si tocca il suo link (insieme a quelle che la precedono,
+# così la posizione dell'ancora non si sposta)
+LAZY_SECTIONS_SCRIPT = """
+(function () {
+    var data = JSON.parse(document.getElementById('menu-sections-data').textContent);
+    var sections = document.querySelectorAll('.menu-section[data-lazy]');
+    function materialize(section) {
+        if (!section.hasAttribute('data-lazy')) return;
+        section.removeAttribute('data-lazy');
+        section.style.minHeight = '';
+        section.insertAdjacentHTML('beforeend', data[section.id]);
+        delete data[section.id];
+    }
+    function materializeUntil(id) {
+        for (var i = 0; i < sections.length; i++) {
+            materialize(sections[i]);
+            if (sections[i].id === id) return true;
+        }
+        return false;
+    }
+    function openHash() {
+        var id = decodeURIComponent(location.hash.slice(1));
+        var target = id && document.getElementById(id);
+        if (target && target.hasAttribute('data-lazy') && materializeUntil(id)) target.scrollIntoView();
+    }
+    document.addEventListener('click', function (event) {
+        var link = event.target.closest ? event.target.closest('a.nav-link') : null;
+        if (link) materializeUntil(decodeURIComponent(link.getAttribute('href').slice(1)));
+    });
+    window.addEventListener('hashchange', openHash);
+    // La ricerca chiede tutte le sezioni prima di filtrare gli articoli
+    document.addEventListener('menu:materialize', function () { materializeUntil(null); });
+    if ('IntersectionObserver' in window) {
+        var observer = new IntersectionObserver(function (entries) {
+            entries.forEach(function (entry) {
+                if (entry.isIntersecting) {
+                    materialize(entry.target);
+                    observer.unobserve(entry.target);
+                }
+            });
+        }, {rootMargin: '800px 0px'});
+        for (var i = 0; i < sections.length; i++) observer.observe(sections[i]);
+    } else {
+        for (var j = 0; j < sections.length; j++) materialize(sections[j]);
+    }
+    openHash();
+})();
+"""
+
+# Renderer della modalità dati: la pagina "guscio" scarica il JSON del menu e costruisce
+# le sezioni con lo stesso markup generato in Python
+MENU_DATA_SCRIPT = """
+(function () {
+    var content = document.getElementById('menu-content');
+    var navigation = document.querySelector('.navigation');
+    function esc(text) {
+        return String(text).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+    }
+    function itemsHtml(sheet) {
+        var html = '';
+        sheet.items.forEach(function (item) {
+            var prices = item.prices || {};
+            if (sheet.layout === 'spina') {
+                html += '<div class="price-row">\\n<div class="price-cell" style="text-align: left; font-weight: bold;">'
+                    + esc(item.name) + (item.producer ? ' - ' + esc(item.producer) : '') + '</div>\\n';
+                sheet.sizes.forEach(function (size) {
+                    html += size in prices ? '<div class="price-cell"><span class="price-value">€' + esc(prices[size]) + '</span></div>\\n' : '<div class="price-cell">-</div>\\n';
+                });
+                html += '</div>\\n';
+                if (item.description) html += '<div class="item-description" style="padding: 4px 0; font-style: italic; color: #7f8c8d; font-size: 0.8em;">' + esc(item.description) + '</div>\\n';
+                return;
+            }
+            var price = 'price' in item ? esc(item.price) : 'Prezzo non disponibile';
+            if (sheet.layout === 'misure') {
+                price = sheet.sizes.filter(function (size) { return size in prices; })
+                    .map(function (size) { return size + 'L: €' + esc(prices[size]); }).join(' ');
+            }
+            html += '<div class="menu-item">\\n<div class="item-header">\\n<div class="item-name">' + esc(item.name)
+                + (item.producer ? ' - <span class="item-producer">' + esc(item.producer) + '</span>' : '') + '</div>\\n'
+                + '<div class="item-price">' + price + '</div>\\n</div>\\n'
+                + (item.description ? '<div class="item-description">' + esc(item.description) + '</div>\\n' : '') + '</div>\\n';
+        });
+        return html;
+    }
+    function sectionHtml(sheet) {
+        var html = '<div class="menu-section" id="' + esc(sheet.id) + '">\\n'
+            + '<h2 class="section-title">' + esc(sheet.name) + ' <a href="#top" class="back-to-top">↑</a></h2>\\n';
+        if (sheet.layout === 'spina') {
+            html += '<div class="price-table">\\n<div class="price-header">\\n<div class="price-row">\\n<div class="price-cell"></div>\\n';
+            sheet.sizes.forEach(function (size) { html += '<div class="price-cell">' + size + 'L</div>\\n'; });
+            html += '</div>\\n</div>\\n' + itemsHtml(sheet) + '</div>\\n';
+        } else {
+            html += itemsHtml(sheet);
+        }
+        return html + '</div>\\n';
+    }
+    function load() {
+        fetch(content.getAttribute('data-src'), {cache: 'no-cache'})
+            .then(function (response) {
+                if (!response.ok) throw new Error(response.status);
+                return response.json();
+            })
+            .then(function (menu) {
+                document.getElementById('menu-date').textContent = menu.generated;
+                content.setAttribute('data-version', menu.version);
+                if (!menu.sheets.length) {
+                    content.innerHTML = '<div class="no-data">Nessun dato disponibile nel menu</div>';
+                    return;
+                }
+                navigation.innerHTML = menu.sheets.map(function (sheet) {
+                    return '<a href="#' + esc(sheet.id) + '" class="nav-link">' + esc(sheet.name) + '</a>';
+                }).join('');
+                content.innerHTML = menu.sheets.map(sectionHtml).join('');
+                var target = location.hash && document.getElementById(decodeURIComponent(location.hash.slice(1)));
+                if (target) target.scrollIntoView();
+            })
+            .catch(function () {
+                content.innerHTML = '<div class="no-data">Menu non disponibile, riprova tra poco</div>';
+            });
+    }
+    // Il piè di pagina con la data viene dopo lo script: si parte a documento caricato
+    if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', load);
+    else load();
+})();
+"""
+
+# Parole ignorate dalla ricerca (articoli, preposizioni e congiunzioni italiane)
+SEARCH_STOPWORDS = frozenset("""
+a ad agli ai al alla alle allo con da dagli dai dal dalla dalle dallo de degli dei del della delle dello di
+e ed gli i il in la le lo negli nei nel nella nelle nello o od per su sugli sui sul sulla sulle sullo tra fra
+un una uno l dell all dall nell sull
+""".split())
+
+# Ruoli delle colonne su cui si cerca: nome, produttore, tipo, caratteristica (es. stile) e descrizione
+SEARCH_ROLES = ('name', 'brewery', 'tipo', 'caratteristica', 'description')
+
+SEARCH_CSS = """        
+        .menu-search {
+            display: flex;
+            align-items: center;
+            gap: 10px;
+            padding: 12px 15px;
+            background: #f8f9fa;
+            border-bottom: 1px solid #eee;
+        }
+        
+        .menu-search input {
+            flex: 1;
+            min-width: 0;
+            padding: 10px 14px;
+            font-size: 1em;
+            border: 1px solid #ccc;
+            border-radius: 20px;
+        }
+        
+        .menu-search-status {
+            color: #7f8c8d;
+            font-size: 0.85em;
+            white-space: nowrap;
+        }
+"""
+
+SEARCH_BOX_TEMPLATE = '<div class="menu-search"><input type="search" id="menu-search" data-index="{index_url}" placeholder="Cerca nel menu (nome, produttore, stile...)" aria-label="Cerca nel menu" autocomplete="off"><span id="menu-search-status" class="menu-search-status" aria-live="polite"></span></div>\n'
+
+# Ricerca nel browser: l'indice viene scaricato al primo utilizzo; ogni parola cercata è un
+# prefisso (ricerca binaria tra le parole ordinate) e gli articoli devono contenerle tutte
+SEARCH_SCRIPT = """
+(function () {
+    var input = document.getElementById('menu-search');
+    var status = document.getElementById('menu-search-status');
+    var index = null;
+    var loading = null;
+    var timer = null;
+    function load() {
+        if (!loading) {
+            loading = fetch(input.getAttribute('data-index'), {cache: 'no-cache'}).then(function (response) {
+                if (!response.ok) throw new Error('HTTP ' + response.status);
+                return response.json();
+            }).then(function (data) {
+                var stopwords = {};
+                var offsets = {};
+                var start = 0;
+                data.stopwords.forEach(function (word) { stopwords[word] = true; });
+                data.sections.forEach(function (section) {
+                    offsets[section[0]] = start;
+                    start += section[1];
+                });
+                index = {terms: data.terms, postings: data.postings, sections: data.sections, stopwords: stopwords, offsets: offsets};
+                return index;
+            });
+            loading.catch(function () { loading = null; });
+        }
+        return loading;
+    }
+    function tokens(text) {
+        return text.normalize('NFD').replace(/[\\u0300-\\u036f]/g, '').toLowerCase().split(/[^a-z0-9]+/).filter(function (token) {
+            return token && !index.stopwords[token];
+        });
+    }
+    function lookup(prefix) {
+        var terms = index.terms;
+        var low = 0;
+        var high = terms.length;
+        while (low < high) {
+            var middle = (low + high) >> 1;
+            if (terms[middle] < prefix) low = middle + 1; else high = middle;
+        }
+        var found = {};
+        for (var i = low; i < terms.length && terms[i].lastIndexOf(prefix, 0) === 0; i++) {
+            var doc = 0;
+            var gaps = index.postings[i];
+            for (var j = 0; j < gaps.length; j++) {
+                doc += gaps[j];
+                found[doc] = true;
+            }
+        }
+        return found;
+    }
+    function show(element, visible) {
+        element.style.display = visible ? '' : 'none';
+    }
+    function apply() {
+        var matches = null;
+        tokens(input.value).forEach(function (word) {
+            var found = lookup(word);
+            if (matches === null) {
+                matches = found;
+                return;
+            }
+            for (var doc in matches) if (!found[doc]) delete matches[doc];
+        });
+        if (matches !== null) document.dispatchEvent(new Event('menu:materialize'));
+        var total = 0;
+        index.sections.forEach(function (entry) {
+            var section = document.getElementById(entry[0]);
+            if (!section) return;
+            var rows = section.querySelectorAll('.menu-item, .price-table > .price-row');
+            var offset = index.offsets[entry[0]];
+            var visible = 0;
+            for (var k = 0; k < rows.length; k++) {
+                var match = matches === null || matches[offset + k] === true;
+                show(rows[k], match);
+                // In Birre Spina la descrizione è la riga successiva
+                var next = rows[k].nextElementSibling;
+                if (next && next.className === 'item-description') show(next, match);
+                if (match) visible++;
+            }
+            show(section, visible > 0 || matches === null);
+            total += visible;
+        });
+        status.textContent = matches === null ? '' : (total === 1 ? '1 risultato' : total + ' risultati');
+    }
+    input.addEventListener('focus', load);
+    input.addEventListener('input', function () {
+        clearTimeout(timer);
+        timer = setTimeout(function () {
+            load().then(apply, function () { status.textContent = 'Ricerca non disponibile'; });
+        }, 60);
+    });
+})();
+"""
+
+@functools.lru_cache(maxsize=65536)
+def search_tokens(text):
+    """
+    Parole di un testo per la ricerca: senza accenti (caffè -> caffe), minuscole, senza le
+    parole di SEARCH_STOPWORDS. Lo script della pagina tratta allo stesso modo il testo cercato
+    """
+    text = re.sub('[\u0300-\u036f]', '', unicodedata.normalize('NFD', text)).lower()
+    return tuple(token for token in re.split(r'[^a-z0-9]+', text) if token and token not in SEARCH_STOPWORDS)
+
+def build_search_index(sheets_data):
+    """
+    Indice invertito per la ricerca nel menu: le parole di nome, produttore, tipo, caratteristica
+    e descrizione in ordine alfabetico e, per ognuna, gli articoli che la contengono.
+    Gli articoli sono numerati foglio per foglio nell'ordine della pagina (sections contiene
+    id e numero di articoli di ogni foglio); ogni lista è salvata come differenze tra numeri
+    consecutivi per tenere il file piccolo
+    """
+    postings = {}
+    sections = []
+    first_doc = 0
+    for sheet_name, df in (sheets_data or {}).items():
+        roles = get_sheet_schema(sheet_name, df.columns)['roles']
+        row_dtype = _row_dtype(df)
+        words = [set() for _ in range(len(df))]
+        for role in SEARCH_ROLES:
+            if not roles[role]:
+                continue
+            values, _, truthy = _column_values(df, roles[role], row_dtype, escape=False)
+            for row in np.flatnonzero(truthy):
+                words[row].update(search_tokens(values[row]))
+        for row, row_words in enumerate(words):
+            for word in row_words:
+                postings.setdefault(word, []).append(first_doc + row)
+        sections.append([section_id(sheet_name), len(df)])
+        first_doc += len(df)
+    
+    terms = sorted(postings)
+    gaps = []
+    for term in terms:
+        docs = postings[term]
+        gaps.append([docs[0]] + [current - previous for previous, current in zip(docs, docs[1:])])
+    return {'stopwords': sorted(SEARCH_STOPWORDS), 'sections': sections, 'terms': terms, 'postings': gaps}
+
+def search_index_path(output_file):
+    """
+    Percorso dell'indice di ricerca accanto al file HTML (es. menu.html -> menu.search.json)
+    """
+    return os.path.splitext(output_file)[0] + '.search.json'
+
+def write_search_index(sheets_data, output_file, precompress=False):
+    """
+    Costruisce e scrive l'indice di ricerca accanto alla pagina, stampandone dimensione
+    e tempo di costruzione. Restituisce l'URL dell'indice relativo alla pagina
+    """
+    index_file = search_index_path(output_file)
+    with span('search_index') as record:
+        index = build_search_index(sheets_data)
+        data = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        record['rows'] = sum(count for _, count in index['sections'])
+        record['bytes'] = len(data)
+    changed = write_file_atomic(index_file, data)
+    write_precompressed(index_file, precompress)
+    compressed = len(gzip.compress(data, compresslevel=9, mtime=0))
+    print(f"🔎 Indice di ricerca: {record['rows']} articoli, {len(index['terms'])} parole, "
+          f"{len(data) / 1024:.1f} KB (gzip {compressed / 1024:.1f} KB), costruito in {record['seconds'] * 1000:.0f} ms"
+          f"{'' if changed else ', invariato'}: {index_file}")
+    return os.path.basename(index_file)
+
+def _search_page_head():
+    """
+    Intestazione della pagina con lo stile della casella di ricerca
+    """
+    return PAGE_HEAD.replace('    </style>', SEARCH_CSS + '    </style>', 1)
+
+def _row_dtype(df):
+    """
+    Tipo dei valori che df.iterrows() restituirebbe: se tutte le colonne sono numeriche
+    vengono convertite a un tipo comune (es. interi -> float), altrimenti restano object
+    """
+    dtypes = list(df.dtypes)
+    if dtypes and all(isinstance(dtype, np.dtype) and dtype.kind in 'iuf' for dtype in dtypes):
+        return np.result_type(*dtypes)
+    return object
+
+def _column_values(df, column, row_dtype, escape=True):
+    """
+    Valori di una colonna pronti per l'HTML: testo di ogni cella (vuoto se mancante, con l'escape
+    dei caratteri speciali salvo escape=False), maschera dei valori presenti e maschera dei valori
+    "veri" (non vuoti e diversi da zero)
+    """
+    series = df[column]
+    present = series.notna().to_numpy()
+    if row_dtype is object:
+        values = series.to_numpy(dtype=object)
+        truthy = present & values.astype(bool)
+    else:
+        values = series.to_numpy(dtype=row_dtype)
+        truthy = present & (values != 0)
+    text = np.where(present, values.astype(str).astype(object), "")
+    return escape_html(text) if escape else text, present, truthy
+
+def _role_values(df, roles, role, row_dtype, escape=True):
+    """
+    Valori della colonna che ha un ruolo (vedi _column_values); una colonna senza ruolo
+    equivale a valori tutti mancanti
+    """
+    if not roles[role]:
+        rows_count = len(df)
+        return np.full(rows_count, "", dtype=object), np.zeros(rows_count, dtype=bool), np.zeros(rows_count, dtype=bool)
+    return _column_values(df, roles[role], row_dtype, escape=escape)
+
+def section_id(sheet_name):
+    """
+    Id della sezione di un foglio nella pagina (es. "Birre Spina" -> "birre_spina"): lo usano i link
+    della navigazione, le sezioni su richiesta, l'indice di ricerca e il JSON dei dati
+    """
+    return sheet_name.lower().replace(" ", "_")
+
+def _description_html(tipo, tipo_truthy, caratteristica, caratteristica_truthy, description, description_truthy):
+    """
+    Descrizione di ogni articolo: tipo e caratteristica (Gin Tonic) hanno la precedenza sulla descrizione
+    """
+    return np.where(tipo_truthy & caratteristica_truthy, render_template(ITEM_DESCRIPTION_TEMPLATE, description_html=tipo + ' - ' + caratteristica),
+           np.where(tipo_truthy, render_template(ITEM_DESCRIPTION_TEMPLATE, description_html=tipo),
+           np.where(caratteristica_truthy, render_template(ITEM_DESCRIPTION_TEMPLATE, description_html=caratteristica),
+           np.where(description_truthy, render_template(ITEM_DESCRIPTION_TEMPLATE, description_html=description), ""))))
+
+def _render_rows(sheet_name, df, schema):
+    """
+    Genera l'HTML di tutti gli articoli di un foglio lavorando sulle colonne intere
+    (valori mancanti, testi e condizioni risolti in blocco) e unendo alla fine le righe.
+    I valori delle colonne hanno già l'escape (vedi _column_values)
+    """
+    rows_count = len(df)
+    row_dtype = _row_dtype(df)
+    roles = schema['roles']
+    role_values = functools.partial(_role_values, df, roles, row_dtype=row_dtype)
+    
+    name, name_present, _ = role_values('name')
+    name = np.where(name_present, name, "Nome non disponibile")
+    description, _, description_truthy = role_values('description')
+    brewery, _, brewery_truthy = role_values('brewery')
+    
+    if schema['price_columns'] and sheet_name == "Birre Spina":
+        # Layout speciale per Birre Spina: nome, un prezzo per misura (ordine decrescente), descrizione
+        prices = ""
+        for price_col in schema['sizes_descending']:
+            price, price_present, _ = _column_values(df, price_col, row_dtype)
+            prices = prices + np.where(price_present, render_template(PRICE_CELL_TEMPLATE, price_html=price), PRICE_CELL_EMPTY_TEMPLATE)
+        rows = render_template(PRICE_ROW_TEMPLATE,
+                               name_html=np.where(brewery_truthy, name + ' - ' + brewery, name),
+                               prices_html=prices,
+                               description_html=np.where(description_truthy, render_template(PRICE_ROW_DESCRIPTION_TEMPLATE, description_html=description), ""))
+        return ''.join(rows)
+    
+    tipo, _, tipo_truthy = role_values('tipo')
+    caratteristica, _, caratteristica_truthy = role_values('caratteristica')
+    
+    # Combina nome e produttore nella stessa riga
+    item_name = np.where(brewery_truthy,
+                         render_template(ITEM_NAME_PRODUCER_TEMPLATE, name_html=name, producer_html=brewery),
+                         render_template(ITEM_NAME_TEMPLATE, name_html=name))
+    
+    if schema['price_columns']:
+        # Prezzi per le diverse misure (ordine crescente) nella stessa cella
+        prices_text = np.full(rows_count, "", dtype=object)
+        for price_col in schema['sizes_ascending']:
+            price, price_present, _ = _column_values(df, price_col, row_dtype)
+            prices_text = prices_text + np.where(price_present, f"{price_col}L: €" + price + " ", "")
+        price = pd.Series(prices_text, dtype=object).str.strip().to_numpy(dtype=object)
+    else:
+        # Caso normale: un prezzo per articolo
+        price, price_present, _ = role_values('price')
+        price = np.where(price_present, price, "Prezzo non disponibile")
+    
+    rows = render_template(ITEM_TEMPLATE, name_html=item_name, price_html=price,
+                           description_html=_description_html(tipo, tipo_truthy, caratteristica, caratteristica_truthy, description, description_truthy))
+    return ''.join(rows)
+
+def iter_sheet_section(sheet_name, df):
+    """
+    Genera il frammento HTML della sezione di un foglio, un pezzo alla volta
+    """
+    yield render_template(SECTION_OPEN_TEMPLATE, section_id=section_id(sheet_name), sheet_name=sheet_name)
+    
+    # Identifica le colonne (escludendo la colonna Menu) e le misure con prezzi numerici
+    schema = get_sheet_schema(sheet_name, df.columns)
+    
+    if schema['price_columns'] and sheet_name == "Birre Spina":
+        # Layout speciale per Birre Spina con tabella prezzi: intestazioni delle misure
+        # spostate a destra di una posizione (ordine decrescente), poi le righe dei prezzi
+        sizes = ''.join(render_template(PRICE_TABLE_SIZE_TEMPLATE, size=str(price_col)) for price_col in schema['sizes_descending'])
+        yield render_template(PRICE_TABLE_OPEN_TEMPLATE, sizes_html=sizes)
+        yield _render_rows(sheet_name, df, schema)
+        yield render_template(PRICE_TABLE_CLOSE_TEMPLATE)
+    else:
+        # Righe del foglio, costruite colonna per colonna
+        yield _render_rows(sheet_name, df, schema)
+    
+    yield render_template(SECTION_CLOSE_TEMPLATE)
+
+def render_sheet_section(sheet_name, df):
+    """
+    Genera il frammento HTML della sezione di un foglio
+    """
+    return ''.join(iter_sheet_section(sheet_name, df))
+
+def _split_section(section_html):
+    """
+    Divide l'HTML di una sezione in intestazione (apertura e titolo) e contenuto
+    """
+    head_end = section_html.index('</h2>\n') + len('</h2>\n')
+    return section_html[:head_end], section_html[head_end:-len('</div>\n')]
+
+def _iter_lazy_sections_data(lazy_sections, minify=False):
+    """
+    Contenuto delle sezioni caricate su richiesta come JSON incorporato nella pagina,
+    seguito dallo script che le costruisce
+    """
+    if minify:
+        lazy_sections = {key: _TAG_GAP.sub('><', body) for key, body in lazy_sections.items()}
+    # "</" e "<!--" non possono comparire dentro un tag <script>
+    data = json.dumps(lazy_sections, ensure_ascii=False).replace('</', '<\\/').replace('<!--', '<\\u0021--')
+    yield '<script type="application/json" id="menu-sections-data">'
+    yield data
+    yield '</script>\n<script>'
+    yield LAZY_SECTIONS_SCRIPT
+    yield '</script>\n'
+
+def iter_complete_html_menu(sheets_data, logo_src="", date=None, sections=None, minify=False, lazy_sections=False, search_url=None):
+    """
+    Genera la pagina HTML completa un frammento alla volta, senza costruirla in memoria.
+    sections può contenere l'HTML già pronto di alcuni fogli (es. dalla cache di build);
+    con minify le parti fisse del template (CSS compreso) sono già minificate.
+    Con lazy_sections solo la prima sezione è nel documento iniziale: le altre hanno solo il
+    titolo (le ancore #birre_spina ecc. restano valide) e il loro contenuto è incorporato come
+    JSON e costruito quando serve. Con search_url la pagina ha una casella di ricerca che usa
+    l'indice a quell'indirizzo (vedi write_search_index)
+    """
+    if date is None:
+        date = datetime.now().strftime("%d/%m/%Y %H:%M")
+    template = _minified_template if minify else str
+    
+    yield template(_search_page_head() if search_url else PAGE_HEAD)
+    # Il logo viene scritto una sola volta nella sua posizione
+    yield logo_html(logo_src)
+    yield template(PAGE_HEADER_TAIL)
+    
+    if sheets_data:
+        # Crea i link di navigazione
+        for sheet_name in sheets_data.keys():
+            yield render_template(NAV_LINK_TEMPLATE, section_id=section_id(sheet_name), sheet_name=sheet_name)
+        yield template(PAGE_NAVIGATION_TAIL)
+        if search_url:
+            yield render_template(SEARCH_BOX_TEMPLATE, index_url=search_url)
+        
+        # Genera il contenuto per ogni foglio
+        lazy_bodies = {}
+        for position, (sheet_name, df) in enumerate(sheets_data.items()):
+            if lazy_sections and position > 0:
+                section_html = sections[sheet_name] if sections and sheet_name in sections else render_sheet_section(sheet_name, df)
+                head, body = _split_section(section_html)
+                lazy_bodies[section_id(sheet_name)] = body
+                # Altezza riservata in base al numero di articoli, tolta quando la sezione viene costruita
+                yield head.replace('">', f'" data-lazy style="min-height: {len(df) * LAZY_ROW_HEIGHT}px">', 1)
+                yield '</div>\n'
+            elif sections and sheet_name in sections:
+                yield sections[sheet_name]
+            else:
+                with span('sheet_render', sheet_name, rows=len(df)) as record:
+                    section_html = render_sheet_section(sheet_name, df)
+                    record['bytes'] = len(section_html.encode('utf-8'))
+                yield section_html
+        if lazy_bodies:
+            yield from _iter_lazy_sections_data(lazy_bodies, minify)
+        if search_url:
+            yield '<script>'
+            yield SEARCH_SCRIPT
+            yield '</script>\n'
+    else:
+        yield template(PAGE_NAVIGATION_TAIL)
+        yield '<div class="no-data">Nessun dato disponibile nel menu</div>'
+    
+    yield template(PAGE_FOOTER).format(date=date)
+
+def write_complete_html_menu(stream, sheets_data, logo_src="", date=None, sections=None, minify=False, lazy_sections=False, search_url=None):
+    """
+    Scrive la pagina HTML completa su un qualsiasi stream di testo (file, socket, StringIO)
+    """
+    chunks = iter_complete_html_menu(sheets_data, logo_src, date=date, sections=sections, minify=minify, lazy_sections=lazy_sections,
+                                     search_url=search_url)
+    for chunk in (minify_html_chunks(chunks) if minify else chunks):
+        stream.write(chunk)
+
+# Spazi tra due tag consecutivi, superflui nell'HTML minificato
+_TAG_GAP = re.compile(r'>\s+<')
+
+def minify_css(css):
+    """
+    Minifica il CSS: toglie commenti, a capo e spazi superflui attorno a { } : ; ,
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{}:;,])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+@functools.lru_cache(maxsize=None)
+def _minified_template(part):
+    """
+    Parte del template HTML minificata (calcolata una sola volta)
+    """
+    def minify_style(match):
+        return match.group(1) + minify_css(match.group(2)) + match.group(3)
+    part = re.sub(r'(<style>)(.*?)(</style>)', minify_style, part, flags=re.S)
+    return _TAG_GAP.sub('><', part)
+
+def minify_html_chunks(chunks):
+    """
+    Minifica la pagina mentre viene generata: toglie gli spazi e gli a capo tra i tag,
+    anche quando cadono a cavallo di due frammenti. Il testo dei tag non viene toccato
+    """
+    last_char = ''
+    pending = ''
+    for chunk in chunks:
+        chunk = _TAG_GAP.sub('><', chunk)
+        stripped = chunk.lstrip()
+        if not stripped:
+            pending += chunk
+            continue
+        
+        # Gli spazi tenuti da parte si scrivono solo se non cadono tra due tag
+        whitespace = pending + chunk[:len(chunk) - len(stripped)]
+        if whitespace and not (last_char == '>' and stripped[0] == '<'):
+            yield whitespace
+        body = stripped.rstrip()
+        pending = stripped[len(body):]
+        last_char = body[-1]
+        yield body
+    if pending and last_char != '>':
+        yield pending
+
+def write_precompressed(output_file, precompress=True):
+    """
+    Scrive accanto al file HTML le versioni .gz e .br alla massima compressione,
+    da servire direttamente dal server statico. Senza precompress rimuove le versioni
+    compresse rimaste da build precedenti, che non sarebbero più aggiornate.
+    Restituisce le dimensioni in byte di ogni file
+    """
+    artifacts = [(output_file + '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        artifacts.append((output_file + '.br', lambda data: brotli.compress(data, quality=11)))
+    elif precompress:
+        print("brotli non installato: il file .br non viene generato (pip install brotli)")
+    
+    if not precompress or brotli is None:
+        stale = [output_file + '.gz', output_file + '.br'] if not precompress else [output_file + '.br']
+        for path in stale:
+            if os.path.exists(path):
+                os.unlink(path)
+                print(f"Rimosso {path}: non corrisponde più al file HTML")
+        if not precompress:
+            return {}
+    
+    with open(output_file, 'rb') as f:
+        data = f.read()
+    sizes = {output_file: len(data)}
+    for path, compress in artifacts:
+        compressed = compress(data)
+        write_file_atomic(path, compressed)
+        sizes[path] = len(compressed)
+    
+    for path, size in sizes.items():
+        print(f"   {path}: {size / 1024:.1f} KB ({size * 100 / len(data):.0f}%)")
+    return sizes
+
+def _sheet_data(sheet_name, df):
+    """
+    Dati di un foglio per l'esportazione JSON: testi già formattati come nell'HTML
+    e, per i fogli con più misure, un prezzo per ogni misura
+    """
+    schema = get_sheet_schema(sheet_name, df.columns)
+    roles = schema['roles']
+    row_dtype = _row_dtype(df)
+    role_values = functools.partial(_role_values, df, roles, row_dtype=row_dtype, escape=False)
+    
+    name, name_present, _ = role_values('name')
+    name = np.where(name_present, name, "Nome non disponibile")
+    description, _, description_truthy = role_values('description')
+    brewery, _, brewery_truthy = role_values('brewery')
+    items = [{'name': item_name} for item_name in name]
+    for item, producer, truthy in zip(items, brewery, brewery_truthy):
+        if truthy:
+            item['producer'] = producer
+    
+    if schema['price_columns']:
+        layout = 'spina' if sheet_name == "Birre Spina" else 'misure'
+        sizes = schema['sizes_descending'] if layout == 'spina' else schema['sizes_ascending']
+        for price_col in sizes:
+            price, price_present, _ = _column_values(df, price_col, row_dtype, escape=False)
+            for item, value, present in zip(items, price, price_present):
+                if present:
+                    item.setdefault('prices', {})[str(price_col)] = value
+    else:
+        layout = 'prezzo'
+        sizes = []
+        price, price_present, _ = role_values('price')
+        for item, value, present in zip(items, price, price_present):
+            if present:
+                item['price'] = value
+    
+    if layout == 'spina':
+        # In Birre Spina la descrizione viene solo dalla sua colonna
+        descriptions = np.where(description_truthy, description, "")
+    else:
+        tipo, _, tipo_truthy = role_values('tipo')
+        caratteristica, _, caratteristica_truthy = role_values('caratteristica')
+        descriptions = np.where(tipo_truthy & caratteristica_truthy, tipo + ' - ' + caratteristica,
+                       np.where(tipo_truthy, tipo,
+                       np.where(caratteristica_truthy, caratteristica,
+                       np.where(description_truthy, description, ""))))
+    for item, item_description in zip(items, descriptions):
+        if item_description:
+            item['description'] = item_description
+    
+    return {'id': section_id(sheet_name), 'name': sheet_name, 'layout': layout,
+            'sizes': [str(price_col) for price_col in sizes], 'items': items}
+
+def build_menu_data(sheets_data):
+    """
+    Modello normalizzato del menu, costruito una volta per esecuzione: i fogli nell'ordine del file
+    Excel con i loro articoli (nome, produttore, prezzo o prezzi per misura, descrizione) e una
+    versione (hash del contenuto) che cambia solo quando cambiano i dati.
+    È il contenuto del JSON della modalità dati e la base di feed delle modifiche ed esportatori
+    """
+    sheets = [_sheet_data(sheet_name, df) for sheet_name, df in (sheets_data or {}).items()]
+    version = hashlib.sha256(json.dumps(sheets, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    return {'version': version, 'generated': datetime.now().strftime("%d/%m/%Y %H:%M"), 'sheets': sheets}
+
+def data_export_path(output_file):
+    """
+    File JSON dei dati del menu accanto alla pagina guscio
+    """
+    return os.path.splitext(output_file)[0] + '.json'
+
+# Campi di un articolo confrontati dal feed delle modifiche (nome e produttore formano la chiave)
+CHANGE_FEED_FIELDS = ('price', 'prices', 'description')
+
+def change_feed_path(output_file):
+    """
+    File JSON con le modifiche dell'ultima build, accanto al file HTML generato
+    """
+    return os.path.splitext(output_file)[0] + '.changes.json'
+
+def published_state_path(output_file):
+    """
+    Dati pubblicati con l'ultima build, usati come riferimento per il feed delle modifiche
+    """
+    directory, file_name = os.path.split(output_file)
+    return os.path.join(directory, f".{file_name}.published.json")
+
+def index_items(items):
+    """
+    Indicizza gli articoli di un foglio per chiave stabile (nome e produttore); gli articoli
+    ripetuti con la stessa chiave vengono distinti dall'ordine in cui compaiono (#2, #3, ...)
+    """
+    indexed = {}
+    for item in items:
+        base_key = f"{item['name']} | {item.get('producer', '')}"
+        key = base_key
+        occurrence = 1
+        while key in indexed:
+            occurrence += 1
+            key = f"{base_key} #{occurrence}"
+        indexed[key] = item
+    return indexed
+
+def diff_menu_data(previous, current):
+    """
+    Confronta due versioni dei dati del menu (fogli indicizzati con index_items) e restituisce,
+    per ogni foglio, gli articoli aggiunti, rimossi e con prezzo o descrizione cambiati.
+    Il confronto passa dagli indici delle chiavi: tempo lineare nel numero di righe
+    """
+    changes = {}
+    for sheet_name in list(previous) + [name for name in current if name not in previous]:
+        old_items = previous.get(sheet_name, {})
+        new_items = current.get(sheet_name, {})
+        added = [dict(key=key, **item) for key, item in new_items.items() if key not in old_items]
+        removed = [key for key in old_items if key not in new_items]
+        changed = []
+        for key, item in new_items.items():
+            old_item = old_items.get(key)
+            if old_item is None or old_item == item:
+                continue
+            fields = {field: {'from': old_item.get(field), 'to': item.get(field)}
+                      for field in CHANGE_FEED_FIELDS if old_item.get(field) != item.get(field)}
+            changed.append({'key': key, 'name': item['name'], 'changes': fields})
+        if added or removed or changed:
+            changes[sheet_name] = {'added': added, 'removed': removed, 'changed': changed}
+    return changes
+
+def write_change_feed(menu_data, output_file):
+    """
+    Scrive il feed delle modifiche rispetto ai dati pubblicati con la build precedente:
+    un piccolo JSON con le versioni di partenza e di arrivo e solo gli articoli cambiati,
+    così tabelloni e servizi di stampa non devono riscaricare tutto il menu.
+    Restituisce le modifiche, oppure None se non c'era una build precedente
+    """
+    state_file = published_state_path(output_file)
+    current = {sheet['name']: index_items(sheet['items']) for sheet in menu_data['sheets']}
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            published = json.load(f)
+    except (OSError, ValueError):
+        published = None
+    
+    if published is not None and published.get('version') == menu_data['version']:
+        return {}
+    
+    changes = None
+    if published is not None:
+        changes = diff_menu_data(published['sheets'], current)
+        feed = {'from': published['version'], 'to': menu_data['version'], 'generated': menu_data['generated'],
+                'sheets_added': [name for name in current if name not in published['sheets']],
+                'sheets_removed': [name for name in published['sheets'] if name not in current],
+                'changes': changes}
+        feed_file = change_feed_path(output_file)
+        write_file_atomic(feed_file, json.dumps(feed, ensure_ascii=False, separators=(',', ':')))
+        counts = [sum(len(sheet[kind]) for sheet in changes.values()) for kind in ('added', 'removed', 'changed')]
+        print(f"Feed delle modifiche: {feed_file} ({counts[0]} aggiunti, {counts[1]} rimossi, {counts[2]} modificati)")
+    
+    write_file_atomic(state_file, json.dumps({'version': menu_data['version'], 'sheets': current}, ensure_ascii=False))
+    return changes
+
+def iter_menu_shell(data_url, logo_src="", minify=False, search_url=None):
+    """
+    Genera la pagina guscio della modalità dati: stesso template e stesso CSS della pagina
+    completa, ma navigazione, sezioni e data vengono riempite dal browser a partire dal JSON
+    """
+    template = _minified_template if minify else str
+    yield template(_search_page_head() if search_url else PAGE_HEAD)
+    yield logo_html(logo_src)
+    yield template(PAGE_HEADER_TAIL)
+    yield template(PAGE_NAVIGATION_TAIL)
+    if search_url:
+        yield render_template(SEARCH_BOX_TEMPLATE, index_url=search_url)
+    yield render_template(SHELL_CONTENT_TEMPLATE, data_url=data_url)
+    yield '<script>'
+    yield MENU_DATA_SCRIPT
+    yield '</script>'
+    if search_url:
+        yield '<script>'
+        yield SEARCH_SCRIPT
+        yield '</script>'
+    yield template(PAGE_FOOTER).format(date='<span id="menu-date"></span>')
+
+def generate_menu_data_export(sheets_data, output_file, logo_src="", minify=False, precompress=False, menu_data=None, search_url=None):
+    """
+    Modalità dati: scrive la pagina guscio (che può restare in cache sui dispositivi) e il
+    JSON compatto del menu. Se la versione dei dati non cambia, il JSON esistente non viene riscritto
+    """
+    data_file = data_export_path(output_file)
+    if menu_data is None:
+        menu_data = build_menu_data(sheets_data)
+    
+    previous_version = None
+    if os.path.exists(data_file):
+        try:
+            with open(data_file, 'r', encoding='utf-8') as f:
+                previous_version = json.load(f).get('version')
+        except (OSError, ValueError):
+            previous_version = None
+    
+    if previous_version == menu_data['version']:
+        print(f"Dati invariati (versione {previous_version}), il file {data_file} non viene riscritto")
+    else:
+        write_file_atomic(data_file, json.dumps(menu_data, ensure_ascii=False, separators=(',', ':')))
+        print(f"Dati del menu esportati: {data_file} (versione {menu_data['version']})")
+        write_precompressed(data_file, precompress)
+    
+    chunks = iter_menu_shell(os.path.basename(data_file), logo_src, minify=minify, search_url=search_url)
+    if write_page(output_file, minify_html_chunks(chunks) if minify else chunks):
+        print(f"Pagina guscio generata: {output_file}")
+    else:
+        print(f"Pagina guscio invariata: {output_file}")
+    write_precompressed(output_file, precompress)
+    return output_file
+
+# Stile aggiunto al foglio di stile condiviso della modalità a pagine: la barra con pagina
+# precedente e successiva riusa l'aspetto della barra di navigazione
+SHARD_CSS = """
+        .pager {
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+        }
+        
+        .pager-position {
+            color: white;
+            margin: 5px 8px;
+        }
+"""
+
+# Collegamenti tra le pagine, con lo stesso markup della barra di navigazione
+NAV_PAGE_LINK_TEMPLATE = '<a href="{href}" class="nav-link">{label}</a>'
+PAGER_TEMPLATE = '<div class="navigation pager">{previous_html}<span class="pager-position">Pagina {page} di {pages}</span>{next_html}</div>\n'
+PAGE_TITLE_TEMPLATE = '<title>{title}</title>'
+
+# Righe da generare oltre le quali le pagine vengono generate in parallelo su più processi
+SHARD_PARALLEL_MIN_ROWS = 5000
+
+def stylesheet_css(minify=False):
+    """
+    CSS della pagina completa (più quello della barra delle pagine) come foglio di stile separato
+    """
+    css = re.search(r'<style>(.*?)</style>', PAGE_HEAD, flags=re.S).group(1) + SHARD_CSS
+    return minify_css(css) if minify else css
+
+def _linked_page_head(stylesheet, title=None):
+    """
+    Intestazione della pagina con il foglio di stile esterno al posto del CSS incorporato
+    """
+    head = re.sub(r'<style>.*?</style>', lambda match: render_template(STYLESHEET_LINK_TEMPLATE, href=stylesheet), PAGE_HEAD, count=1, flags=re.S)
+    if title:
+        head = head.replace('<title>Menu Completo The Craft</title>', render_template(PAGE_TITLE_TEMPLATE, title=title), 1)
+    return head
+
+def plan_shards(sheets_data, output_file, page_size=None):
+    """
+    Divide il menu in pagine: una per foglio oppure, con page_size, pagine di al massimo
+    page_size righe nei fogli più lunghi (es. menu-birre_spina.html, menu-birre_spina-2.html).
+    Restituisce la lista delle pagine con file, foglio, righe (start, stop), numero e totale delle pagine
+    """
+    directory, file_name = os.path.split(output_file)
+    stem = os.path.splitext(file_name)[0]
+    shards = []
+    used = set()
+    for sheet_name, df in sheets_data.items():
+        # Solo lettere, cifre e "_": il "-" separa il numero della pagina
+        slug = re.sub(r'[^A-Za-z0-9_]+', '_', section_id(sheet_name)).strip('_') or "foglio"
+        base, counter = slug, 2
+        while slug in used:
+            slug = f"{base}_{counter}"
+            counter += 1
+        used.add(slug)
+        
+        rows = len(df)
+        size = page_size if page_size and rows > page_size else max(rows, 1)
+        pages = max(1, -(-rows // size))
+        for page in range(pages):
+            suffix = f"-{page + 1}" if page else ""
+            shards.append({'file': os.path.join(directory, f"{stem}-{slug}{suffix}.html"), 'sheet': sheet_name,
+                           'start': page * size, 'stop': min(rows, (page + 1) * size), 'page': page + 1, 'pages': pages})
+    return shards
+
+def iter_shard_page(sheet_name, df, navigation_html, stylesheet, logo_src="", pager_html="", date=None, minify=False):
+    """
+    Genera una pagina della modalità a pagine: intestazione e navigazione come nella pagina
+    completa (con i link alle altre pagine), la sezione del foglio (o una parte) e la barra delle pagine
+    """
+    if date is None:
+        date = datetime.now().strftime("%d/%m/%Y %H:%M")
+    template = _minified_template if minify else str
+    yield template(_linked_page_head(stylesheet, f"{sheet_name} - Menu The Craft"))
+    yield logo_html(logo_src)
+    yield template(PAGE_HEADER_TAIL)
+    yield navigation_html
+    yield template(PAGE_NAVIGATION_TAIL)
+    yield from iter_sheet_section(sheet_name, df)
+    yield pager_html
+    yield template(PAGE_FOOTER).format(date=date)
+
+def iter_shard_index(navigation_html, stylesheet, logo_src="", date=None, minify=False):
+    """
+    Genera la pagina indice della modalità a pagine: solo intestazione e barra di navigazione
+    """
+    if date is None:
+        date = datetime.now().strftime("%d/%m/%Y %H:%M")
+    template = _minified_template if minify else str
+    yield template(_linked_page_head(stylesheet))
+    yield logo_html(logo_src)
+    yield template(PAGE_HEADER_TAIL)
+    yield navigation_html
+    yield template(PAGE_NAVIGATION_TAIL)
+    if not navigation_html:
+        yield '<div class="no-data">Nessun dato disponibile nel menu</div>'
+    yield template(PAGE_FOOTER).format(date=date)
+
+def render_shard_page(job):
+    """
+    Genera e scrive una pagina della modalità a pagine (anche in un processo separato).
+    Restituisce file, byte scritti, tempo impiegato e se il file è stato sostituito
+    """
+    start = time.perf_counter()
+    chunks = iter_shard_page(job['sheet'], job['df'], job['navigation'], job['stylesheet'], job['logo_src'],
+                             job['pager'], date=job['date'], minify=job['minify'])
+    # I messaggi dei processi paralleli non si mescolano sul terminale
+    with contextlib.redirect_stdout(io.StringIO()):
+        changed = write_file_atomic(job['file'], minify_html_chunks(chunks) if job['minify'] else chunks)
+        write_precompressed(job['file'], job['precompress'])
+    return {'file': job['file'], 'changed': changed, 'bytes': os.path.getsize(job['file']),
+            'seconds': time.perf_counter() - start}
+
+def remove_outputs(paths):
+    """
+    Cancella i file generati da build precedenti che non servono più, con le versioni .gz e .br
+    """
+    for path in paths:
+        for stale in (path, path + '.gz', path + '.br'):
+            if os.path.exists(stale):
+                os.unlink(stale)
+                print(f"Rimosso {stale}: non fa più parte del menu")
+
+def generate_sharded_menu(sheets_data, output_file, cache=None, logo_src="", minify=False, precompress=False,
+                          page_size=None, jobs=None):
+    """
+    Modalità a pagine: una pagina per foglio (o pagine di page_size righe nei fogli lunghi),
+    una pagina indice leggera in output_file con la barra di navigazione e il CSS in un foglio
+    di stile condiviso con l'hash nel nome, che i browser tengono in cache.
+    Con cache le pagine il cui contenuto non è cambiato non vengono né generate né riscritte;
+    le altre vengono generate in parallelo su jobs processi (predefinito: numero di CPU).
+    Le pagine delle build precedenti non più usate vengono cancellate
+    """
+    directory = os.path.dirname(output_file)
+    css = stylesheet_css(minify)
+    stylesheet = f"{os.path.splitext(os.path.basename(output_file))[0]}.{hashlib.sha256(css.encode('utf-8')).hexdigest()[:10]}.css"
+    stylesheet_path = os.path.join(directory, stylesheet)
+    if write_file_atomic(stylesheet_path, css):
+        print(f"Foglio di stile scritto: {stylesheet_path}")
+    write_precompressed(stylesheet_path, precompress)
+    
+    shards = plan_shards(sheets_data or {}, output_file, page_size)
+    navigation = ''.join(render_template(NAV_PAGE_LINK_TEMPLATE, href=os.path.basename(shard['file']), label=shard['sheet'])
+                         for shard in shards if shard['page'] == 1)
+    logo_hash = hashlib.sha256((logo_src or "").encode('utf-8')).hexdigest()
+    previous = cache.get('shards', {}) if cache is not None else {}
+    hashes = {stylesheet_path: stylesheet}
+    date = datetime.now().strftime("%d/%m/%Y %H:%M")
+    
+    pending = []
+    for position, shard in enumerate(shards):
+        df = sheets_data[shard['sheet']].iloc[shard['start']:shard['stop']]
+        pager = ""
+        if shard['pages'] > 1:
+            previous_html = render_template(NAV_PAGE_LINK_TEMPLATE, href=os.path.basename(shards[position - 1]['file']), label="← Precedente") if shard['page'] > 1 else ""
+            next_html = render_template(NAV_PAGE_LINK_TEMPLATE, href=os.path.basename(shards[position + 1]['file']), label="Successiva →") if shard['page'] < shard['pages'] else ""
+            pager = render_template(PAGER_TEMPLATE, previous_html=previous_html, next_html=next_html, page=str(shard['page']), pages=str(shard['pages']))
+        shard_hash = hashlib.sha256(json.dumps([hash_sheet(shard['sheet'], df), navigation, pager, stylesheet, logo_hash,
+                                                [minify, precompress]]).encode('utf-8')).hexdigest()
+        hashes[shard['file']] = shard_hash
+        if previous.get(shard['file']) == shard_hash and os.path.exists(shard['file']):
+            continue
+        pending.append({'file': shard['file'], 'sheet': shard['sheet'], 'df': df, 'navigation': navigation, 'stylesheet': stylesheet,
+                        'logo_src': logo_src, 'pager': pager, 'date': date, 'minify': minify, 'precompress': precompress})
+    
+    rows = sum(len(job['df']) for job in pending)
+    workers = min(jobs or os.cpu_count() or 1, len(pending))
+    if workers > 1 and rows >= SHARD_PARALLEL_MIN_ROWS:
+        with concurrent_futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(render_shard_page, pending))
+    else:
+        workers = 1
+        results = [render_shard_page(job) for job in pending]
+    for job, result in zip(pending, results):
+        _record_span({'stage': 'sheet_render', 'sheet': job['sheet'], 'rows': len(job['df']), 'bytes': result['bytes'],
+                      'seconds': result['seconds']})
+    if pending:
+        rewritten = sum(1 for result in results if result['changed'])
+        print(f"Pagine generate: {len(pending)}/{len(shards)} con {workers} processi, riscritte: {rewritten}")
+    else:
+        print(f"Nessuna pagina cambiata ({len(shards)} pagine)")
+    
+    # Pagina indice
+    index_hash = hashlib.sha256(json.dumps([navigation, stylesheet, logo_hash, [minify, precompress]]).encode('utf-8')).hexdigest()
+    hashes[output_file] = index_hash
+    if previous.get(output_file) == index_hash and os.path.exists(output_file):
+        print(f"Pagina indice invariata: {output_file}")
+    else:
+        chunks = iter_shard_index(navigation, stylesheet, logo_src, date=date, minify=minify)
+        if write_page(output_file, minify_html_chunks(chunks) if minify else chunks):
+            print(f"Pagina indice generata: {output_file}")
+        write_precompressed(output_file, precompress)
+    
+    remove_outputs(path for path in previous if path not in hashes)
+    if cache is not None:
+        cache['shards'] = hashes
+        cache['page'] = None  # la pagina completa va rigenerata se si torna alla modalità normale
+    return [shard['file'] for shard in shards]
+
+# Formati di esportazione registrati: nome -> suffisso del file, funzione e descrizione
+EXPORTERS = {}
+
+def register_exporter(name, suffix, description=""):
+    """
+    Registra un formato di esportazione (da usare come decoratore). La funzione riceve il modello
+    del menu (build_menu_data) e le opzioni logo_src, minify e date e genera il contenuto un frammento
+    alla volta; il file viene scritto accanto alla pagina con il suffisso indicato (es. ".txt")
+    """
+    def decorator(render):
+        EXPORTERS[name] = {'suffix': suffix, 'render': render, 'description': description}
+        return render
+    return decorator
+
+def load_plugin(path):
+    """
+    Carica un file .py di plugin (opzione --plugin): i formati che registra con
+    register_exporter diventano disponibili per --export
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None:
+        raise ImportError(f"{path} non è un file Python")
+    module = importlib.util.module_from_spec(spec)
+    # In sys.modules, così i processi di --export-jobs ritrovano le funzioni del plugin
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def export_path(output_file, name):
+    """
+    Percorso del file di un formato di esportazione (es. menu.html -> menu.txt, menu.print.html)
+    """
+    return os.path.splitext(output_file)[0] + EXPORTERS[name]['suffix']
+
+def _price_text(sheet, item, separator=" "):
+    """
+    Prezzo di un articolo come nella pagina: una misura dopo l'altra per i fogli con più misure
+    """
+    if sheet['layout'] == 'prezzo':
+        return item.get('price', "Prezzo non disponibile")
+    prices = item.get('prices', {})
+    return separator.join(f"{size}L: €{prices[size]}" for size in sheet['sizes'] if size in prices).strip()
+
+PRINT_PAGE_HEAD = """<!DOCTYPE html>
+<html lang="it">
+<head>
+    <meta charset="UTF-8">
+    <title>Menu The Craft</title>
+    <style>
+        @page {
+            size: A4;
+            margin: 14mm 12mm;
+        }
+        
+        body {
+            font-family: Georgia, 'Times New Roman', serif;
+            font-size: 10pt;
+            color: #222;
+            margin: 0;
+        }
+        
+        .print-header {
+            text-align: center;
+            margin-bottom: 6mm;
+        }
+        
+        .logo {
+            max-height: 22mm;
+        }
+        
+        .print-header h1 {
+            font-size: 20pt;
+            margin: 2mm 0 0;
+        }
+        
+        .print-columns {
+            column-count: 2;
+            column-gap: 10mm;
+        }
+        
+        .print-section h2 {
+            font-size: 13pt;
+            border-bottom: 1px solid #999;
+            margin: 0 0 2mm;
+            padding-top: 3mm;
+            break-after: avoid;
+        }
+        
+        .print-item {
+            break-inside: avoid;
+            margin-bottom: 2mm;
+        }
+        
+        .print-item-header {
+            display: flex;
+            justify-content: space-between;
+            gap: 4mm;
+            font-weight: bold;
+        }
+        
+        .print-producer {
+            font-weight: normal;
+            font-style: italic;
+        }
+        
+        .print-price {
+            white-space: nowrap;
+        }
+        
+        .print-description {
+            font-size: 8.5pt;
+            color: #555;
+        }
+        
+        .print-footer {
+            margin-top: 6mm;
+            text-align: center;
+            font-size: 8pt;
+            color: #777;
+        }
+    </style>
+</head>
+<body>
+    <div class="print-header">
+        """
+
+PRINT_HEADER_TAIL = """
+        <h1>Menu The Craft</h1>
+    </div>
+    <div class="print-columns">
+"""
+
+PRINT_FOOTER = """    </div>
+    <div class="print-footer">Generato il {date} | Menu The Craft</div>
+</body>
+</html>"""
+
+PRINT_SECTION_OPEN_TEMPLATE = '<div class="print-section">\n<h2>{sheet_name}</h2>\n'
+PRINT_ITEM_TEMPLATE = '<div class="print-item">\n<div class="print-item-header"><span>{name}{producer_html}</span><span class="print-price">{price}</span></div>\n{description_html}</div>\n'
+PRINT_PRODUCER_TEMPLATE = ' <span class="print-producer">{producer}</span>'
+PRINT_DESCRIPTION_TEMPLATE = '<div class="print-description">{description}</div>\n'
+
+@register_exporter('print', '.print.html', "menu A4 da stampare o salvare in PDF")
+def export_print(menu, logo_src="", minify=False, date=None):
+    """
+    Menu A4 pronto per la stampa (o per "Salva come PDF" del browser): due colonne, senza
+    sfondi né navigazione, articoli mai spezzati tra due pagine
+    """
+    template = _minified_template if minify else str
+    yield template(PRINT_PAGE_HEAD)
+    yield logo_html(logo_src)
+    yield template(PRINT_HEADER_TAIL)
+    for sheet in menu['sheets']:
+        yield render_template(PRINT_SECTION_OPEN_TEMPLATE, sheet_name=sheet['name'])
+        for item in sheet['items']:
+            producer = render_template(PRINT_PRODUCER_TEMPLATE, producer=item['producer']) if 'producer' in item else ""
+            description = render_template(PRINT_DESCRIPTION_TEMPLATE, description=item['description']) if 'description' in item else ""
+            price = _price_text(sheet, item, separator=" · ")
+            if price and sheet['layout'] == 'prezzo' and 'price' in item:
+                price = "€" + price
+            yield render_template(PRINT_ITEM_TEMPLATE, name=item['name'], producer_html=producer, price=price, description_html=description)
+        yield '</div>\n'
+    yield template(PRINT_FOOTER).format(date=date or menu['generated'])
+
+# Larghezza in caratteri delle righe del formato testo (tabelloni e monitor delle spine)
+TEXT_EXPORT_WIDTH = 48
+
+def _text_line(left, right, width=TEXT_EXPORT_WIDTH):
+    """
+    Riga con il testo a sinistra e il prezzo allineato a destra, uniti da puntini;
+    se non c'è spazio il prezzo va a capo
+    """
+    if not right:
+        return left
+    if len(left) + len(right) + 2 > width:
+        return left + "\n" + right.rjust(width)
+    return left + " " + "." * (width - len(left) - len(right) - 2) + " " + right
+
+@register_exporter('text', '.txt', "testo semplice per tabelloni e monitor")
+def export_text(menu, logo_src="", minify=False, date=None):
+    """
+    Menu in testo semplice a larghezza fissa (TEXT_EXPORT_WIDTH): titolo dei fogli, una riga
+    per articolo con il prezzo a destra e la descrizione rientrata sotto
+    """
+    yield "MENU THE CRAFT".center(TEXT_EXPORT_WIDTH).rstrip() + "\n"
+    for sheet in menu['sheets']:
+        yield "\n" + sheet['name'].upper() + "\n" + "=" * TEXT_EXPORT_WIDTH + "\n"
+        for item in sheet['items']:
+            name = item['name'] + (" - " + item['producer'] if 'producer' in item else "")
+            price = _price_text(sheet, item, separator="  ")
+            if sheet['layout'] == 'prezzo' and 'price' in item:
+                price = "€" + price
+            lines = [_text_line(line, "") for line in textwrap.wrap(name, TEXT_EXPORT_WIDTH)] or [""]
+            lines[-1] = _text_line(lines[-1], price)
+            if 'description' in item:
+                lines += textwrap.wrap(item['description'], TEXT_EXPORT_WIDTH, initial_indent="  ", subsequent_indent="  ")
+            yield "\n".join(lines) + "\n"
+    yield "\n" + f"Generato il {date or menu['generated']}".center(TEXT_EXPORT_WIDTH).rstrip() + "\n"
+
+def run_exporter(name, menu, output_file, options):
+    """
+    Genera e scrive un formato di esportazione (anche in un processo separato).
+    Restituisce nome, file, byte, tempo impiegato e se il file è stato sostituito
+    """
+    start = time.perf_counter()
+    path = export_path(output_file, name)
+    changed = write_file_atomic(path, EXPORTERS[name]['render'](menu, **options))
+    return {'name': name, 'file': path, 'changed': changed, 'bytes': os.path.getsize(path), 'seconds': time.perf_counter() - start}
+
+def run_exporters(menu, output_file, names, logo_src="", minify=False, precompress=False, jobs=None):
+    """
+    Scrive i formati richiesti (nomi registrati in EXPORTERS) a partire dallo stesso modello del menu,
+    uno dopo l'altro o con jobs > 1 in parallelo su più processi, stampando il tempo di ciascuno.
+    Restituisce i resoconti dei formati
+    """
+    unknown = [name for name in names if name not in EXPORTERS]
+    if unknown:
+        raise ValueError(f"formati sconosciuti: {', '.join(unknown)} (disponibili: {', '.join(EXPORTERS)})")
+    if not names:
+        return []
+    options = {'logo_src': logo_src or "", 'minify': minify, 'date': menu['generated']}
+    workers = min(jobs or 1, len(names))
+    if workers > 1:
+        with concurrent_futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_exporter, names, [menu] * len(names), [output_file] * len(names), [options] * len(names)))
+    else:
+        results = [run_exporter(name, menu, output_file, options) for name in names]
+    
+    for result in results:
+        _record_span({'stage': f"export_{result['name']}", 'sheet': None, 'rows': sum(len(sheet['items']) for sheet in menu['sheets']),
+                      'bytes': result['bytes'], 'seconds': result['seconds']})
+        state = "" if result['changed'] else ", invariato"
+        print(f"📤 {result['name']:<6} {result['file']} ({result['bytes'] / 1024:.1f} KB) in {result['seconds'] * 1000:.0f} ms{state}")
+        write_precompressed(result['file'], precompress)
+    return results
+
+def write_page(output_file, chunks):
+    """
+    Scrive la pagina mentre viene generata, misurando separatamente la composizione
+    del template (tempo speso a produrre i frammenti, compreso il render delle sezioni
+    non in cache) e la scrittura del file. Restituisce False se il file era già identico
+    """
+    with span('page_write') as write_record:
+        assembly_record = {'stage': 'template_assembly', 'sheet': None, 'rows': None, 'bytes': None, 'seconds': 0.0}
+        changed = write_file_atomic(output_file, timed_chunks(chunks, assembly_record))
+        write_record['bytes'] = assembly_record['bytes'] = os.path.getsize(output_file)
+        write_record['seconds'] -= assembly_record['seconds']
+    _record_span(assembly_record)
+    return changed
+
+def generate_complete_html_menu(sheets_data, output_file="menu_completo.html", cache_file=None, logo_src=None,
+                                minify=False, precompress=False, lazy_sections=False, data_export=False, change_feed=False,
+                                shard=False, page_size=None, search=False, exports=(), export_jobs=None):
+    """
+    Genera un file HTML responsive completo con tutti i fogli.
+    Con cache_file le sezioni dei fogli non modificati vengono riprese dal manifest
+    e, se nulla è cambiato, il file HTML esistente non viene riscritto.
+    logo_src permette di passare il logo già pronto (data URI o URL del file esterno).
+    minify toglie spazi e a capo da CSS e markup; precompress scrive anche i file .gz e .br;
+    lazy_sections inserisce subito solo la prima sezione e costruisce le altre quando servono;
+    data_export scrive invece una pagina guscio e il JSON dei dati (vedi generate_menu_data_export);
+    change_feed scrive anche il JSON con gli articoli cambiati dalla build precedente (vedi write_change_feed);
+    shard divide il menu in una pagina per foglio, o in pagine di page_size righe (vedi generate_sharded_menu);
+    search scrive l'indice di ricerca accanto alla pagina e aggiunge la casella di ricerca (vedi write_search_index);
+    exports elenca altri formati da scrivere dallo stesso modello (es. "print", "text", vedi run_exporters)
+    """
+    menu_data = build_menu_data(sheets_data) if data_export or change_feed or exports else None
+    if change_feed:
+        write_change_feed(menu_data, output_file)
+    
+    if exports:
+        if logo_src is None:
+            logo_src = get_logo_base64()
+        run_exporters(menu_data, output_file, exports, logo_src, minify=minify, precompress=precompress, jobs=export_jobs)
+    
+    search_url = None
+    if search and shard:
+        print("La ricerca non è disponibile nella modalità a pagine")
+    elif search:
+        search_url = write_search_index(sheets_data, output_file, precompress)
+    
+    cache = load_build_cache(cache_file) if cache_file else None
+    
+    if data_export:
+        if logo_src is None:
+            logo_src = get_logo_base64()
+        output_file = generate_menu_data_export(sheets_data, output_file, logo_src, minify=minify, precompress=precompress,
+                                                menu_data=menu_data, search_url=search_url)
+        if cache is not None:
+            # Il file ora è il guscio: la pagina completa va rigenerata se si torna alla modalità normale
+            cache['page'] = None
+            save_build_cache(cache_file, cache)
+        return output_file
+    
+    if shard:
+        if logo_src is None:
+            logo_src = get_logo_base64()
+        generate_sharded_menu(sheets_data, output_file, cache, logo_src, minify=minify, precompress=precompress, page_size=page_size)
+        if cache is not None:
+            save_build_cache(cache_file, cache)
+        return output_file
+    
+    if cache is not None and cache.get('shards'):
+        # Pagine della modalità a pagine di una build precedente
+        remove_outputs(path for path in cache.pop('shards') if path != output_file)
+    
+    sections = {}
+    reused_sections = 0
+    
+    if cache is not None and sheets_data:
+        for sheet_name, df in sheets_data.items():
+            # Riusa il frammento della build precedente se il foglio non è cambiato
+            sheet_hash = hash_sheet(sheet_name, df)
+            cached_section = cache['sections'].get(sheet_name)
+            if cached_section and cached_section['hash'] == sheet_hash:
+                section_html = cached_section['html']
+                reused_sections += 1
+            else:
+                with span('sheet_render', sheet_name, rows=len(df)) as record:
+                    section_html = render_sheet_section(sheet_name, df)
+                    record['bytes'] = len(section_html.encode('utf-8'))
+            sections[sheet_name] = {'hash': sheet_hash, 'html': section_html}
+    
+    if logo_src is None:
+        logo_src = get_logo_base64()
+    
+    if cache is not None:
+        print(f"Sezioni riutilizzate dalla cache: {reused_sections}/{len(sections)}")
+        page_hash = hashlib.sha256(json.dumps([
+            list(sheets_data.keys()) if sheets_data else [],
+            [section['hash'] for section in sections.values()],
+            hashlib.sha256(logo_src.encode('utf-8')).hexdigest(),
+            [minify, precompress, lazy_sections, search_url],
+        ]).encode('utf-8')).hexdigest()
+        
+        # Nessuna modifica: il file esistente resta com'è
+        if cache['page'] == page_hash and os.path.exists(output_file):
+            print(f"Nessuna modifica, il file {output_file} non viene riscritto")
+            return output_file
+        
+        cache['page'] = page_hash
+        cache['sections'] = sections
+    
+    # Salva il file HTML scrivendo i frammenti direttamente su disco
+    section_html = {sheet_name: section['html'] for sheet_name, section in sections.items()}
+    chunks = iter_complete_html_menu(sheets_data, logo_src, sections=section_html, minify=minify, lazy_sections=lazy_sections,
+                                     search_url=search_url)
+    if write_page(output_file, minify_html_chunks(chunks) if minify else chunks):
+        print(f"Menu HTML completo generato con successo: {output_file}")
+    else:
+        print(f"Contenuto identico, il file {output_file} non viene sostituito")
+    write_precompressed(output_file, precompress)
+    
+    if cache is not None:
+        save_build_cache(cache_file, cache)
+    
+    return output_file
+
+def build_menu(excel_file, output_file, logo_src=None, snapshot_dir=None, **output_options):
+    """
+    Legge il file Excel e genera il menu HTML; restituisce i dati dei fogli o None in caso di errore.
+    output_options sono le opzioni di generate_complete_html_menu (es. minify, precompress)
+    """
+    sheets_data = read_all_excel_sheets(excel_file, snapshot_dir=snapshot_dir)
+    if sheets_data:
+        generate_complete_html_menu(sheets_data, output_file, cache_file=build_cache_path(output_file), logo_src=logo_src, **output_options)
+        report_page_weight(output_file, logo_src)
+    return sheets_data
+
+def file_signatures(paths):
+    """
+    Firme (data di modifica e dimensione) dei file controllati da watch e serve
+    """
+    return {path: _file_signature(path) for path in paths}
+
+def _change_steps(watched, signatures, interval, debounce):
+    """
+    Controllo delle modifiche comune a watch e serve, senza attese proprie: produce i secondi
+    da attendere prima di ogni controllo e restituisce le nuove firme quando un file è cambiato
+    e il salvataggio è terminato (le firme non cambiano più per debounce secondi)
+    """
+    while True:
+        yield interval
+        current = file_signatures(watched)
+        if current != signatures:
+            break
+    
+    # Attende che il salvataggio sia terminato prima di rigenerare
+    while True:
+        yield debounce
+        latest = file_signatures(watched)
+        if latest == current:
+            return current
+        current = latest
+
+def wait_for_change(watched, signatures, interval=0.2, debounce=0.1):
+    """
+    Attende (bloccando) che uno dei file cambi e restituisce le nuove firme
+    """
+    steps = _change_steps(watched, signatures, interval, debounce)
+    try:
+        while True:
+            time.sleep(next(steps))
+    except StopIteration as stop:
+        return stop.value
+
+async def wait_for_change_async(watched, signatures, interval=0.2, debounce=0.1):
+    """
+    Come wait_for_change, ma attende con asyncio senza bloccare il server
+    """
+    steps = _change_steps(watched, signatures, interval, debounce)
+    try:
+        while True:
+            await asyncio.sleep(next(steps))
+    except StopIteration as stop:
+        return stop.value
+
+def watch_menu(excel_file, output_file, logo_path="The_Craft_logo.png", interval=0.2, debounce=0.1, logo_external=False, logo_max_width=None,
+               output_options=None, snapshot_dir=None):
+    """
+    Resta in ascolto sul file Excel e sul logo e rigenera il menu a ogni salvataggio.
+    Il processo resta attivo (pandas e openpyxl già importati, logo già codificato);
+    le modifiche ravvicinate vengono raggruppate finché i file non smettono di cambiare
+    """
+    watched = [excel_file, logo_path]
+    logo_src = prepare_logo(logo_path, output_file, logo_external, logo_max_width)
+    signatures = file_signatures(watched)
+    build_menu(excel_file, output_file, logo_src=logo_src, snapshot_dir=snapshot_dir, **(output_options or {}))
+    print(f"\n👀 In ascolto delle modifiche a {excel_file} e {logo_path} (Ctrl+C per uscire)")
+    
+    try:
+        while True:
+            current = wait_for_change(watched, signatures, interval, debounce)
+            changed = [path for path in watched if current[path] != signatures[path]]
+            signatures = current
+            start = time.perf_counter()
+            
+            if logo_path in changed:
+                logo_src = prepare_logo(logo_path, output_file, logo_external, logo_max_width)
+            if current[excel_file] is None:
+                print(f"Errore: Il file {excel_file} non esiste!")
+                continue
+            
+            sheets_data = build_menu(excel_file, output_file, logo_src=logo_src, snapshot_dir=snapshot_dir, **(output_options or {}))
+            elapsed = (time.perf_counter() - start) * 1000
+            since_save = (time.time() - max(signature[0] for signature in current.values() if signature) / 1e9) * 1000
+            if sheets_data:
+                print(f"🔄 [{datetime.now().strftime('%H:%M:%S')}] Modificati: {', '.join(changed)} | "
+                      f"rigenerazione {elapsed:.0f} ms | dal salvataggio {since_save:.0f} ms")
+            else:
+                print("❌ Errore nella lettura del file Excel, attendo il prossimo salvataggio")
+    except KeyboardInterrupt:
+        print("\nModalità watch terminata")
+
+# Secondi dopo cui una connessione inattiva della modalità serve viene chiusa
+SERVE_IDLE_TIMEOUT = 30
+
+# Corpo massimo (in byte) di una richiesta che viene letto e scartato per tenere viva la connessione;
+# oltre questo limite, o con Transfer-Encoding, la connessione viene chiusa dopo la risposta
+SERVE_MAX_DISCARDED_BODY = 1 << 20
+
+def _served_resource(body, content_type):
+    """
+    Risorsa della modalità serve: corpo in chiaro e versioni compresse, con il loro ETag
+    """
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    bodies = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        bodies['br'] = brotli.compress(body, quality=11)
+    etags = {encoding: f'"{digest}"' if encoding == 'identity' else f'"{digest}-{encoding}"' for encoding in bodies}
+    return {'type': content_type, 'bodies': bodies, 'etags': etags}
+
+def render_served_menu(excel_file, logo_src="", snapshot_dir=None, minify=False, lazy_sections=False):
+    """
+    Legge il file Excel e prepara in memoria le risorse della modalità serve
+    (pagina completa e dati JSON), oppure None se non ci sono dati
+    """
+    sheets_data = read_all_excel_sheets(excel_file, snapshot_dir=snapshot_dir)
+    if not sheets_data:
+        return None
+    chunks = iter_complete_html_menu(sheets_data, logo_src, minify=minify, lazy_sections=lazy_sections)
+    page = ''.join(minify_html_chunks(chunks) if minify else chunks).encode('utf-8')
+    data = json.dumps(build_menu_data(sheets_data), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    page_resource = _served_resource(page, 'text/html; charset=utf-8')
+    return {'/': page_resource, '/index.html': page_resource,
+            '/menu.json': _served_resource(data, 'application/json; charset=utf-8')}
+
+def _accepted_encoding(accept_encoding):
+    """
+    Sceglie la codifica della risposta dall'intestazione Accept-Encoding: br, poi gzip, altrimenti in chiaro
+    """
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ('br', 'gzip'):
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+def serve_response(resources, method, target, headers):
+    """
+    Risposta della modalità serve a una richiesta: (stato, intestazioni, corpo).
+    Per HEAD il corpo viene calcolato comunque (serve la sua lunghezza) ma non inviato.
+    Con If-None-Match uguale all'ETag attuale risponde 304 senza corpo
+    """
+    if method not in ('GET', 'HEAD'):
+        return 405, [('Allow', 'GET, HEAD')], b''
+    resource = (resources or {}).get(target.split('?', 1)[0])
+    if resource is None:
+        status = 404 if resources else 503
+        return status, [('Content-Type', 'text/plain; charset=utf-8')], ("Non trovato" if resources else "Menu non disponibile").encode('utf-8')
+    
+    encoding = _accepted_encoding(headers.get('accept-encoding', ''))
+    if encoding not in resource['bodies']:
+        encoding = 'gzip' if encoding == 'br' else 'identity'
+    response_headers = [('ETag', resource['etags'][encoding]), ('Cache-Control', 'no-cache'), ('Vary', 'Accept-Encoding')]
+    
+    # Qualsiasi variante dell'ETag attuale vale: il contenuto è lo stesso, cambia solo la compressione
+    if_none_match = headers.get('if-none-match')
+    if if_none_match:
+        candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        if '*' in candidates or candidates & set(resource['etags'].values()):
+            return 304, response_headers, b''
+    
+    body = resource['bodies'][encoding]
+    response_headers.append(('Content-Type', resource['type']))
+    if encoding != 'identity':
+        response_headers.append(('Content-Encoding', encoding))
+    return 200, response_headers, body
+
+async def _serve_connection(reader, writer, state):
+    """
+    Gestisce una connessione HTTP/1.1 (anche con più richieste in keep-alive)
+    """
+    reasons = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 503: 'Service Unavailable'}
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), SERVE_IDLE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                break
+            lines = head.decode('latin-1').split('\r\n')
+            request = lines[0].split(' ')
+            headers = {}
+            for line in lines[1:]:
+                name, separator, value = line.partition(':')
+                if separator:
+                    headers[name.strip().lower()] = value.strip()
+            
+            if len(request) != 3:
+                method, status, response_headers, body, keep_alive = None, 400, [], b'', False
+            else:
+                method, target, version = request
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                status, response_headers, body = serve_response(state['resources'], method, target, headers)
+                
+                # Il server non usa mai il corpo della richiesta (es. POST, risposta 405), ma va tolto
+                # dallo stream: altrimenti verrebbe letto come la richiesta successiva
+                length = headers.get('content-length', '0')
+                if 'transfer-encoding' in headers or not length.isdigit():
+                    keep_alive = False
+                elif int(length) > SERVE_MAX_DISCARDED_BODY:
+                    keep_alive = False
+                elif int(length) and keep_alive:
+                    try:
+                        await asyncio.wait_for(reader.readexactly(int(length)), SERVE_IDLE_TIMEOUT)
+                    except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                        keep_alive = False
+            
+            response = [f"HTTP/1.1 {status} {reasons.get(status, '')}"]
+            response += [f"{name}: {value}" for name, value in response_headers]
+            response += [f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}", "", ""]
+            writer.write('\r\n'.join(response).encode('latin-1') + (b'' if method == 'HEAD' else body))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def _watch_served_menu(state, watched, render, interval, debounce):
+    """
+    Controlla i file a intervalli regolari e, quando cambiano, prepara le nuove risorse in un thread
+    separato: nel frattempo le richieste continuano a ricevere la versione precedente
+    """
+    loop = asyncio.get_running_loop()
+    signatures = file_signatures(watched)
+    while True:
+        signatures = await wait_for_change_async(watched, signatures, interval, debounce)
+        start = time.perf_counter()
+        try:
+            resources = await loop.run_in_executor(None, render)
+        except Exception as e:
+            print(f"❌ Errore nella rigenerazione: {e}")
+            continue
+        if resources is None:
+            print("❌ Errore nella lettura del file Excel, continuo a servire la versione precedente")
+            continue
+        state['resources'] = resources
+        print(f"🔄 [{datetime.now().strftime('%H:%M:%S')}] Menu aggiornato in memoria ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+async def _serve(excel_file, logo_path, host, port, interval, render):
+    """
+    Avvia il server asincrono e il controllo delle modifiche ai file
+    """
+    state = {'resources': render()}
+    server = await asyncio.start_server(lambda reader, writer: _serve_connection(reader, writer, state), host, port)
+    address = server.sockets[0].getsockname()
+    print(f"\n🌐 Menu disponibile su http://{address[0]}:{address[1]}/ (dati in /menu.json, Ctrl+C per uscire)")
+    watcher = asyncio.create_task(_watch_served_menu(state, [excel_file, logo_path], render, interval, 0.1))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+def serve_menu(excel_file, logo_path="The_Craft_logo.png", host="127.0.0.1", port=8000, interval=0.5, logo_max_width=None,
+               snapshot_dir=None, minify=False, lazy_sections=False):
+    """
+    Serve il menu via HTTP tenendo in memoria dati e pagina (già compressa con gzip e brotli):
+    il file Excel viene riletto solo quando cambia e le risposte usano ETag/If-None-Match,
+    così i tablet possono controllare spesso il menu con risposte 304 quasi a costo zero
+    """
+    def render():
+        logo_src = get_logo_base64(logo_path, logo_max_width)
+        return render_served_menu(excel_file, logo_src, snapshot_dir=snapshot_dir, minify=minify, lazy_sections=lazy_sections)
+    
+    try:
+        asyncio.run(_serve(excel_file, logo_path, host, port, interval, render))
+    except KeyboardInterrupt:
+        print("\nServer terminato")
+
+def import_heavy_modules(snapshots=False):
+    """
+    Importa davvero i moduli caricati al primo utilizzo (pandas, numpy, openpyxl e, per gli snapshot,
+    pyarrow). Va chiamata prima di creare un pool di processi: i processi figli li ereditano già
+    importati invece di importarli ognuno da capo
+    """
+    pd.DataFrame
+    np.ndarray
+    openpyxl.load_workbook
+    if snapshots and pa is not None:
+        pa.Table
+
+# Logo già codificato condiviso dai processi della modalità batch
+_BATCH_LOGO = None
+
+def _init_batch_worker(logo_src):
+    """
+    Inizializza un processo della modalità batch con il logo già codificato
+    """
+    global _BATCH_LOGO
+    _BATCH_LOGO = logo_src
+
+def run_batch_job(excel_file, output_file, logo_src=None, output_options=None, snapshot_dir=None):
+    """
+    Genera un singolo menu della modalità batch e restituisce il resoconto del lavoro
+    (tempi, fogli processati, eventuale errore) senza mai sollevare eccezioni
+    """
+    if logo_src is None:
+        logo_src = _BATCH_LOGO
+    result = {'excel': excel_file, 'output': output_file, 'ok': False, 'sheets': 0,
+              'read_seconds': 0.0, 'render_seconds': 0.0, 'error': None}
+    log = io.StringIO()
+    try:
+        # I messaggi dei singoli lavori non si mescolano sul terminale
+        with contextlib.redirect_stdout(log):
+            start = time.perf_counter()
+            sheets_data = read_all_excel_sheets(excel_file, snapshot_dir=snapshot_dir)
+            result['read_seconds'] = time.perf_counter() - start
+            if sheets_data:
+                start = time.perf_counter()
+                generate_complete_html_menu(sheets_data, output_file, cache_file=build_cache_path(output_file), logo_src=logo_src,
+                                            **(output_options or {}))
+                result['render_seconds'] = time.perf_counter() - start
+                result['sheets'] = len(sheets_data)
+                result['ok'] = True
+        if not result['ok']:
+            lines = log.getvalue().strip().splitlines()
+            result['error'] = lines[-1] if lines else "Nessun foglio con dati nel file Excel"
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+def collect_batch_jobs(patterns, output_dir="."):
+    """
+    Trasforma gli argomenti della modalità batch in coppie (file Excel, file HTML).
+    Ogni argomento è un file, un glob (es. "locali/*.xlsx") o una coppia esplicita EXCEL=HTML;
+    senza coppia esplicita l'HTML prende il nome del file Excel nella cartella output_dir
+    """
+    jobs = []
+    missing = []
+    for pattern in patterns:
+        excel_pattern, separator, output_file = pattern.partition('=')
+        if separator:
+            jobs.append((excel_pattern, output_file))
+            continue
+        matches = sorted(glob.glob(excel_pattern)) if glob.has_magic(excel_pattern) else [excel_pattern]
+        if not matches:
+            missing.append(excel_pattern)
+        for excel_file in matches:
+            output_name = os.path.splitext(os.path.basename(excel_file))[0] + ".html"
+            jobs.append((excel_file, os.path.join(output_dir, output_name)))
+    return jobs, missing
+
+def run_batch(patterns, output_dir=".", logo_path="The_Craft_logo.png", jobs=None, logo_external=False, logo_max_width=None,
+              output_options=None, snapshot_dir=None):
+    """
+    Genera più menu (un file Excel per locale o lingua) in parallelo su un pool di processi.
+    Il logo viene codificato una volta sola; un errore in un lavoro non interrompe gli altri.
+    Restituisce la lista dei resoconti dei lavori
+    """
+    batch_jobs, missing = collect_batch_jobs(patterns, output_dir)
+    for pattern in missing:
+        print(f"⚠️  Nessun file trovato per: {pattern}")
+    
+    outputs = [output_file for _, output_file in batch_jobs]
+    duplicates = sorted(set(output_file for output_file in outputs if outputs.count(output_file) > 1))
+    if duplicates:
+        print(f"❌ Più file Excel genererebbero lo stesso file HTML: {', '.join(duplicates)}")
+        return []
+    if not batch_jobs:
+        print("❌ Nessun file Excel da elaborare")
+        return []
+    
+    os.makedirs(output_dir, exist_ok=True)
+    if logo_external:
+        # Il nome del logo esterno dipende solo dal contenuto: è lo stesso in ogni cartella
+        output_dirs = sorted(set(os.path.dirname(os.path.abspath(output_file)) for output_file in outputs))
+        for directory in output_dirs:
+            os.makedirs(directory, exist_ok=True)
+            logo_src = write_logo_asset(logo_path, directory, logo_max_width)
+    else:
+        logo_src = get_logo_base64(logo_path, logo_max_width)
+    workers = min(jobs or os.cpu_count() or 1, len(batch_jobs))
+    print(f"Generazione di {len(batch_jobs)} menu con {workers} processi")
+    
+    results = []
+    start = time.perf_counter()
+    
+    def report(result):
+        elapsed = (result['read_seconds'] + result['render_seconds']) * 1000
+        if result['ok']:
+            print(f"✅ {result['excel']} -> {result['output']} | {result['sheets']} fogli | "
+                  f"lettura {result['read_seconds'] * 1000:.0f} ms, generazione {result['render_seconds'] * 1000:.0f} ms, totale {elapsed:.0f} ms")
+        else:
+            print(f"❌ {result['excel']} -> {result['output']} | {result['error']}")
+        results.append(result)
+    
+    if workers == 1:
+        for excel_file, output_file in batch_jobs:
+            report(run_batch_job(excel_file, output_file, logo_src=logo_src, output_options=output_options, snapshot_dir=snapshot_dir))
+    else:
+        import_heavy_modules(snapshots=bool(snapshot_dir))
+        with concurrent_futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(logo_src,)) as executor:
+            futures = {executor.submit(run_batch_job, excel_file, output_file, output_options=output_options, snapshot_dir=snapshot_dir):
+                       (excel_file, output_file)
+                       for excel_file, output_file in batch_jobs}
+            for future in concurrent_futures.as_completed(futures):
+                excel_file, output_file = futures[future]
+                try:
+                    report(future.result())
+                except Exception as e:
+                    # Ad esempio un processo terminato in modo anomalo
+                    report({'excel': excel_file, 'output': output_file, 'ok': False, 'sheets': 0,
+                            'read_seconds': 0.0, 'render_seconds': 0.0, 'error': f"{type(e).__name__}: {e}"})
+    
+    wall_time = time.perf_counter() - start
+    serial_time = sum(result['read_seconds'] + result['render_seconds'] for result in results)
+    failed = [result for result in results if not result['ok']]
+    print(f"\n📊 Menu generati: {len(results) - len(failed)}/{len(results)} | tempo totale {wall_time:.2f} s "
+          f"(somma dei lavori {serial_time:.2f} s)")
+    for result in failed:
+        print(f"   ❌ {result['excel']}: {result['error']}")
+    return results
+
+def run_cache_command(action, patterns, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Comando "cache": warm crea gli snapshot dei file Excel indicati, clear li cancella tutti
+    """
+    if action == "clear":
+        removed = clear_snapshots(snapshot_dir)
+        print(f"🧹 Snapshot rimossi da {snapshot_dir}: {removed}")
+        return 0
+    
+    if pa is None:
+        print("❌ pyarrow non installato: gli snapshot non sono disponibili (pip install pyarrow)")
+        return 1
+    workbooks, missing = collect_batch_jobs(patterns)
+    for pattern in missing:
+        print(f"⚠️  Nessun file trovato per: {pattern}")
+    failed = len(missing)
+    for excel_file, _ in workbooks:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            sheets_data = read_all_excel_sheets(excel_file, snapshot_dir=snapshot_dir)
+        elapsed = (time.perf_counter() - start) * 1000
+        if sheets_data is None:
+            print(f"❌ {excel_file}: errore nella lettura del file Excel")
+            failed += 1
+        else:
+            print(f"🔥 {excel_file}: snapshot pronto ({len(sheets_data)} fogli, {elapsed:.0f} ms)")
+    return 1 if failed else 0
+
+def run(args, output_options, build_options):
+    """
+    Esegue il comando letto da menu_generator_complete.py: build, watch, serve, batch o cache.
+    build_options sono le opzioni registrate nel manifest per il controllo rapido (vedi inputs_unchanged)
+    """
+    set_verbosity(1 + args.verbose)
+    for plugin in args.plugin:
+        try:
+            load_plugin(plugin)
+        except Exception as e:
+            print(f"Errore nel caricamento del plugin {plugin}: {e}")
+            return 2
+    exports = output_options['exports']
+    unknown = [name for name in exports if name not in EXPORTERS]
+    if unknown:
+        print(f"Errore: formati sconosciuti: {', '.join(unknown)} (disponibili: {', '.join(EXPORTERS)})")
+        return 2
+    logo_external = build_options['logo_external']
+    snapshot_dir = None if args.no_snapshot else args.snapshot_dir
+    
+    if args.command == "cache":
+        return run_cache_command(args.action, args.workbooks or [args.excel], args.snapshot_dir)
+    
+    if args.command == "batch":
+        results = run_batch(args.workbooks, output_dir=args.output_dir, logo_path=args.logo, jobs=args.jobs,
+                            logo_external=logo_external, logo_max_width=args.logo_max_width, output_options=output_options,
+                            snapshot_dir=snapshot_dir)
+        return 0 if results and all(result['ok'] for result in results) else 1
+    
+    excel_file = args.excel
+    
+    if not os.path.exists(excel_file):
+        print(f"Errore: Il file {excel_file} non esiste!")
+        return
+    
+    if args.command == "serve":
+        serve_menu(excel_file, logo_path=args.logo, host=args.host, port=args.port, interval=args.interval,
+                   logo_max_width=args.logo_max_width, snapshot_dir=snapshot_dir, minify=args.minify,
+                   lazy_sections=args.lazy_sections)
+        return
+    
+    if args.watch:
+        watch_menu(excel_file, args.output, logo_path=args.logo, interval=args.interval,
+                   logo_external=logo_external, logo_max_width=args.logo_max_width, output_options=output_options,
+                   snapshot_dir=snapshot_dir)
+        return
+    
+    outputs = [args.output] + ([data_export_path(args.output)] if args.data_export else [])
+    if args.search and not output_options['shard']:
+        outputs.append(search_index_path(args.output))
+    outputs += [export_path(args.output, name) for name in exports]
+    
+    print(f"Leggendo il file: {excel_file}")
+    timings_file = args.timings or (os.path.splitext(args.profile)[0] + '.timings.json' if args.profile else None)
+    profiler = cProfile.Profile() if args.profile else None
+    if timings_file:
+        start_spans()
+    if profiler:
+        profiler.enable()
+    try:
+        logo_src = prepare_logo(args.logo, args.output, logo_external, args.logo_max_width)
+        sheets_data = build_menu(excel_file, args.output, logo_src=logo_src, snapshot_dir=snapshot_dir, **output_options)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"Profilo cProfile salvato in {args.profile} (python -m pstats {args.profile})")
+        if timings_file:
+            write_timings_report(timings_file, stop_spans())
+    
+    if sheets_data:
+        output_file = args.output
+        if output_options['shard']:
+            outputs = list(load_build_cache(build_cache_path(output_file)).get('shards', {}))
+        record_build_inputs(output_file, excel_file, args.logo, build_options, outputs)
+        print(f"\n✅ Menu HTML completo generato con successo!")
+        print(f"📱 File creato: {output_file}")
+        print(f"🌐 Apri il file nel browser per visualizzare il menu completo ottimizzato per smartphone")
+        print(f"📊 Fogli processati: {len(sheets_data)}")
+    else:
+        print("❌ Errore nella lettura del file Excel")